@@ -0,0 +1,78 @@
+import random
+import time
+from collections import deque
+
+from FordFulkerson import Graph
+
+
+def hopcroft_karp(n_left, n_right, adj):
+    """ Return (size, match) for a maximum matching of a bipartite graph.
+    adj[u] lists the right vertices (0..n_right-1) adjacent to left vertex u.
+    match[u] is the right vertex matched to left vertex u, or -1.
+    Each phase finds a maximal set of vertex-disjoint shortest augmenting
+    paths, so only O(sqrt(V)) phases are needed. """
+    match_left = [-1] * n_left
+    match_right = [-1] * n_right
+    size = 0
+    inf = float('inf')
+    while True:
+        # BFS from every free left vertex builds the layers of this phase
+        dist = [inf] * n_left
+        queue = deque()
+        for u in range(n_left):
+            if match_left[u] == -1:
+                dist[u] = 0
+                queue.append(u)
+        found = False
+        while queue:
+            u = queue.popleft()
+            for v in adj[u]:
+                w = match_right[v]
+                if w == -1:
+                    found = True            # a free right vertex ends a path
+                elif dist[w] == inf:
+                    dist[w] = dist[u] + 1
+                    queue.append(w)
+        if not found:
+            return size, match_left
+        # iterative DFS along the layers from each free left vertex
+        current = [0] * n_left
+        for root in range(n_left):
+            if match_left[root] != -1:
+                continue
+            stack = [root]
+            while stack:
+                u = stack[-1]
+                if current[u] == len(adj[u]):
+                    dist[u] = inf           # dead end for the rest of the phase
+                    stack.pop()
+                    continue
+                v = adj[u][current[u]]
+                current[u] += 1
+                w = match_right[v]
+                if w == -1:
+                    # augment: flip the matching along the stack, from the end
+                    while stack:
+                        u = stack.pop()
+                        match_right[v], match_left[u], v = u, v, match_left[u]
+                    size += 1
+                elif dist[w] == dist[u] + 1:
+                    stack.append(w)
+
+if __name__ == '__main__':
+    rnd = random.Random(3)
+    n = 5000
+    adj = [rnd.sample(range(n), 3) for _ in range(n)]
+
+    start = time.perf_counter()
+    size, match = hopcroft_karp(n, n, adj)
+    print('Hopcroft-Karp: matching of size %d (%.2f s)' % (size, time.perf_counter() - start))
+
+    # same problem as a unit-capacity flow network: source 0, left 1..n,
+    # right n+1..2n, sink 2n+1
+    start = time.perf_counter()
+    edges = ([(0, u + 1, 1) for u in range(n)] +
+             [(u + 1, n + 1 + v, 1) for u in range(n) for v in adj[u]] +
+             [(n + 1 + v, 2 * n + 1, 1) for v in range(n)])
+    flow = Graph.from_edges(2 * n + 2, edges).ford_fulkerson(0, 2 * n + 1)
+    print('Ford-Fulkerson: matching of size %d (%.2f s)' % (flow, time.perf_counter() - start))
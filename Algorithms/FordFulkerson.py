@@ -1,27 +1,67 @@
-from collections import defaultdict
+from collections import defaultdict, deque
 from pprint import pprint
 
 
 class Graph:
     def __init__(self, graph):
-        self.graph = graph
-        self.ROW = len(graph)
+        """ Build the residual graph from a dense V x V capacity matrix.
+        The matrix is copied into sparse rows, so it is left untouched. """
+        self._reset(len(graph))
+        for u, row in enumerate(graph):
+            for v, capacity in enumerate(row):
+                if capacity > 0:
+                    self.add_edge(u, v, capacity)
+
+    @classmethod
+    def from_adjacency(cls, adjacency):
+        """ Build from adjacency lists: adjacency[u] is a dict {v: capacity}
+        or a list of (v, capacity) pairs. """
+        g = cls.__new__(cls)
+        g._reset(len(adjacency))
+        for u, row in enumerate(adjacency):
+            for v, capacity in (row.items() if isinstance(row, dict) else row):
+                g.add_edge(u, v, capacity)
+        return g
+
+    @classmethod
+    def from_edges(cls, n, edges):
+        """ Build from (u, v, capacity) tuples on vertices 0..n-1. """
+        g = cls.__new__(cls)
+        g._reset(n)
+        for u, v, capacity in edges:
+            g.add_edge(u, v, capacity)
+        return g
+
+    def _reset(self, n):
+        self.graph = [{} for _ in range(n)]    # graph[u][v] is residual capacity
+        self.ROW = n
+        self._mark = [0] * n                    # BFS visit stamps, reused by every search
+        self._stamp = 0
+
+    def add_edge(self, u, v, capacity):
+        """ Add capacity from u to v (parallel edges are merged). """
+        self.graph[u][v] = self.graph[u].get(v, 0) + capacity
+        self.graph[v].setdefault(u, 0)          # reverse entry for residual flow
 
     def searching_algor_BFS(self, s, t, parent):
-        visited = [False] * self.ROW
-        queue = []
-        queue.append(s)
-        visited[s] = True
+        # a fresh stamp marks vertices of this search as visited, so the
+        # buffer never has to be cleared or reallocated
+        self._stamp += 1
+        stamp, mark = self._stamp, self._mark
+        mark[s] = stamp
+        queue = deque([s])
 
         while queue:
-            u = queue.pop(0)
-            for ind, val in enumerate(self.graph[u]):
-                if visited[ind] == False and val > 0:
-                    queue.append(ind)
-                    visited[ind] = True
-                    parent[ind] = u
+            u = queue.popleft()
+            for v, capacity in self.graph[u].items():
+                if mark[v] != stamp and capacity > 0:
+                    mark[v] = stamp
+                    parent[v] = u
+                    if v == t:                  # shortest augmenting path found
+                        return True
+                    queue.append(v)
 
-        return True if visited[t] else False
+        return False
 
     def ford_fulkerson(self, source, sink):
         parent = [-1] * self.ROW
@@ -44,17 +84,287 @@ class Graph:
         return max_flow
 
 
-graph = [[0, 8, 0, 0, 3, 0],
-         [0, 0, 9, 0, 0, 0],
-         [0, 0, 0, 0, 7, 2],
-         [0, 0, 0, 0, 0, 5],
-         [0, 0, 7, 4, 0, 0],
-         [0, 0, 0, 0, 0, 0]]
+class FlowNetwork:
+    """ Sparse residual network for maximum-flow problems on vertices 0..n-1.
+    Every edge (u, v) is stored as a pair of arcs in flat lists: arc a leads to
+    self._to[a] and its reverse arc is a ^ 1. The capacities given by the
+    caller are copied, so the input is never modified by a solve. """
+
+    def __init__(self, n):
+        self._n = n
+        self._adj = [[] for _ in range(n)]  # arcs leaving each vertex
+        self._to = []
+        self._cap = []                      # capacity of each arc (0 for reverses)
+        self._res = []                      # residual capacity of each arc
+        self._terminals = None              # (s, t) of the flow held in self._res
+        self._value = 0                     # value of that flow
+
+    @classmethod
+    def from_matrix(cls, graph):
+        """ Build a network from a dense V x V capacity matrix (left untouched). """
+        network = cls(len(graph))
+        for u, row in enumerate(graph):
+            for v, c in enumerate(row):
+                if c > 0:
+                    network.add_edge(u, v, c)
+        return network
+
+    @classmethod
+    def from_edges(cls, n, edges):
+        """ Build a network on n vertices from (u, v, capacity) tuples. """
+        network = cls(n)
+        for u, v, c in edges:
+            network.add_edge(u, v, c)
+        return network
+
+    def add_edge(self, u, v, capacity):
+        """ Add an edge from u to v and return its arc id. """
+        a = len(self._to)
+        self._to += [v, u]
+        self._cap += [capacity, 0]
+        self._res += [capacity, 0]
+        self._adj[u].append(a)
+        self._adj[v].append(a + 1)
+        return a
+
+    def flow(self, a):
+        """ Return the flow on arc a after the last solve. """
+        return self._cap[a] - self._res[a]
+
+    def flow_value(self):
+        """ Return the value of the current flow. """
+        return self._value
+
+    def solve(self, s, t):
+        """ Return the maximum flow from s to t. If the current flow already goes
+        from s to t (after an earlier solve, possibly followed by capacity
+        changes), it is kept and only augmented: a warm start whose cost depends
+        on how much the answer changed rather than on the size of the network. """
+        if self._terminals != (s, t):
+            self._res = list(self._cap)
+            self._terminals = (s, t)
+            self._value = 0
+        self._value += self._dinic(s, t)
+        return self._value
+
+    def set_capacity(self, a, capacity):
+        """ Change the capacity of edge arc a (as returned by add_edge), keeping
+        the current flow feasible. An increase only adds residual capacity. On a
+        decrease below the flow on a, the surplus is first rerouted around a, and
+        whatever cannot be rerouted is cancelled back to s and from t, lowering
+        the flow value. Call solve() afterwards to reach the new maximum; several
+        changes can be batched before one solve. """
+        flow = self._cap[a] - self._res[a]
+        self._cap[a] = capacity
+        if capacity >= flow:
+            self._res[a] = capacity - flow
+            return
+        excess = flow - capacity
+        self._res[a] = 0
+        self._res[a ^ 1] -= excess
+        u, v = self._to[a ^ 1], self._to[a]
+        s, t = self._terminals
+        rest = excess - self._push(u, v, excess)
+        if rest:
+            self._push(u, s, rest)          # u now receives rest too much ...
+            self._push(t, v, rest)          # ... and v lacks rest
+            self._value -= rest
+
+    def _push(self, x, y, limit):
+        """ Send up to limit units from x to y along residual paths (BFS
+        augmentations); return the amount sent. """
+        if x == y:
+            return limit
+        adj, to, res = self._adj, self._to, self._res
+        sent = 0
+        while sent < limit:
+            via = {x: -1}                   # arc used to reach each vertex
+            queue = deque([x])
+            while queue and y not in via:
+                u = queue.popleft()
+                for a in adj[u]:
+                    if res[a] > 0 and to[a] not in via:
+                        via[to[a]] = a
+                        queue.append(to[a])
+            if y not in via:
+                break
+            f = limit - sent
+            v = y
+            while v != x:
+                f = min(f, res[via[v]])
+                v = to[via[v] ^ 1]
+            v = y
+            while v != x:
+                res[via[v]] -= f
+                res[via[v] ^ 1] += f
+                v = to[via[v] ^ 1]
+            sent += f
+        return sent
+
+    def _levels(self, s):
+        """ BFS over arcs with residual capacity; return distance of each vertex from s (-1 if unreached). """
+        level = [-1] * self._n
+        level[s] = 0
+        queue = deque([s])
+        adj, to, res = self._adj, self._to, self._res
+        while queue:
+            u = queue.popleft()
+            for a in adj[u]:
+                v = to[a]
+                if res[a] > 0 and level[v] < 0:
+                    level[v] = level[u] + 1
+                    queue.append(v)
+        return level
+
+    def min_cut(self, s):
+        """ Return (S, T) after a solve: S holds the vertices still reachable from s
+        in the residual network, T the rest. The arcs from S to T form a minimum cut. """
+        level = self._levels(s)
+        S = {v for v in range(self._n) if level[v] >= 0}
+        return S, set(range(self._n)) - S
+
+    def max_flow_dinic(self, s, t):
+        """ Return the maximum flow from s to t using Dinic's algorithm: BFS builds
+        a level graph, then blocking flows are found with current-arc pointers. """
+        self._res = list(self._cap)
+        self._terminals = (s, t)
+        self._value = self._dinic(s, t)
+        return self._value
+
+    def _dinic(self, s, t):
+        if s == t:
+            return 0
+        adj, to, res = self._adj, self._to, self._res
+        total = 0
+        while True:
+            level = self._levels(s)
+            if level[t] < 0:
+                return total
+            current = [0] * self._n         # next arc to try at each vertex
+            path = []                       # arcs from s to u
+            u = s
+            while True:
+                if u == t:                  # augment along the path found
+                    f = min(res[a] for a in path)
+                    for a in path:
+                        res[a] -= f
+                        res[a ^ 1] += f
+                    total += f
+                    path = []
+                    u = s
+                    continue
+                arcs = adj[u]
+                while current[u] < len(arcs):
+                    a = arcs[current[u]]
+                    if res[a] > 0 and level[to[a]] == level[u] + 1:
+                        break
+                    current[u] += 1
+                if current[u] < len(arcs):  # advance
+                    path.append(arcs[current[u]])
+                    u = to[arcs[current[u]]]
+                elif not path:              # s is blocked: phase is over
+                    break
+                else:                       # dead end: retreat past u
+                    level[u] = -1
+                    u = to[path.pop() ^ 1]
+                    current[u] += 1
+
+    def max_flow_push_relabel(self, s, t):
+        """ Return the maximum flow from s to t using highest-label push-relabel
+        with an exact initial labeling and the gap heuristic. The preflow is
+        completed to a valid flow, so flow() and min_cut() can be used afterwards. """
+        self._res = list(self._cap)
+        n, adj, to, res = self._n, self._adj, self._to, self._res
+        self._terminals, self._value = (s, t), 0
+        if s == t:
+            return 0
+        # exact initial labels: residual distance to t (n if t is unreachable)
+        height = [n] * n
+        height[t] = 0
+        queue = deque([t])
+        while queue:
+            v = queue.popleft()
+            for a in adj[v]:
+                u = to[a]
+                if res[a ^ 1] > 0 and height[u] == n and u != t:
+                    height[u] = height[v] + 1
+                    queue.append(u)
+        height[s] = n
+        count = [0] * (2 * n + 1)           # vertices at each height
+        for h in height:
+            count[h] += 1
+        excess = [0] * n
+        current = [0] * n
+        buckets = [[] for _ in range(2 * n + 1)]
+        highest = 0
+        for a in adj[s]:                    # saturate every arc leaving s
+            c, v = res[a], to[a]
+            if c > 0 and v != s:            # a self-loop at s carries nothing
+                res[a] = 0
+                res[a ^ 1] += c
+                if excess[v] == 0 and v != t:
+                    buckets[height[v]].append(v)
+                    highest = max(highest, height[v])
+                excess[v] += c
+        while highest >= 0:
+            if not buckets[highest]:
+                highest -= 1
+                continue
+            u = buckets[highest].pop()
+            arcs = adj[u]
+            while excess[u] > 0:            # discharge u
+                if current[u] == len(arcs):
+                    # relabel: lift u just above its lowest residual neighbor
+                    old = height[u]
+                    new = 2 * n
+                    for a in arcs:
+                        if res[a] > 0 and to[a] != u and height[to[a]] + 1 < new:
+                            new = height[to[a]] + 1
+                    count[old] -= 1
+                    if count[old] == 0 and old < n:
+                        # gap: nothing above old can reach t any more
+                        for v in range(n):
+                            if old < height[v] < n:
+                                count[height[v]] -= 1
+                                height[v] = n + 1
+                                count[n + 1] += 1
+                        new = max(new, n + 1)
+                    height[u] = new
+                    count[new] += 1
+                    current[u] = 0
+                    continue
+                a = arcs[current[u]]
+                v = to[a]
+                if res[a] > 0 and height[u] == height[v] + 1:
+                    d = min(excess[u], res[a])
+                    res[a] -= d
+                    res[a ^ 1] += d
+                    excess[u] -= d
+                    if excess[v] == 0 and v != s and v != t:
+                        buckets[height[v]].append(v)
+                        highest = max(highest, height[v])
+                    excess[v] += d
+                else:
+                    current[u] += 1
+        self._value = excess[t]
+        return excess[t]
+
 
-g = Graph(graph)
+if __name__ == '__main__':
+    graph = [[0, 8, 0, 0, 3, 0],
+             [0, 0, 9, 0, 0, 0],
+             [0, 0, 0, 0, 7, 2],
+             [0, 0, 0, 0, 0, 5],
+             [0, 0, 7, 4, 0, 0],
+             [0, 0, 0, 0, 0, 0]]
 
-source = 0
-sink = 5
+    g = Graph(graph)
 
-print('Max flow: %d' % g.ford_fulkerson(source, sink))
+    source = 0
+    sink = 5
 
+    network = FlowNetwork.from_matrix(graph)
+    print('Max flow (push-relabel): %d' % network.max_flow_push_relabel(source, sink))
+    print('Max flow (Dinic): %d' % network.max_flow_dinic(source, sink))
+    print('Min cut source side:', sorted(network.min_cut(source)[0]))
+    print('Max flow: %d' % g.ford_fulkerson(source, sink))
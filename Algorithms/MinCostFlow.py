@@ -0,0 +1,127 @@
+import heapq
+import random
+import time
+from collections import deque
+
+from FordFulkerson import FlowNetwork, Graph
+
+
+class MinCostFlowNetwork(FlowNetwork):
+    """ Flow network whose edges also carry a cost per unit of flow.
+    min_cost_flow uses successive shortest paths: each augmenting path is a
+    cheapest path in the residual network, found by Dijkstra on costs reduced
+    by vertex potentials so that every residual arc has a non-negative cost. """
+
+    def __init__(self, n):
+        super().__init__(n)
+        self._cost = []                     # cost of each arc (negated on reverses)
+
+    def add_edge(self, u, v, capacity, cost=0):
+        """ Add an edge from u to v with a cost per unit of flow; return its arc id. """
+        self._cost += [cost, -cost]
+        return super().add_edge(u, v, capacity)
+
+    @classmethod
+    def from_edges(cls, n, edges):
+        """ Build a network on n vertices from (u, v, capacity, cost) tuples. """
+        network = cls(n)
+        for u, v, capacity, cost in edges:
+            network.add_edge(u, v, capacity, cost)
+        return network
+
+    def _initial_potentials(self, s):
+        """ Shortest-path costs from s (Bellman-Ford with a queue), needed only
+        when some edge has a negative cost. """
+        n, adj, to, res, cost = self._n, self._adj, self._to, self._res, self._cost
+        inf = float('inf')
+        dist = [inf] * n
+        dist[s] = 0
+        queued = [False] * n
+        queue = deque([s])
+        while queue:
+            u = queue.popleft()
+            queued[u] = False
+            for a in adj[u]:
+                v = to[a]
+                if res[a] > 0 and dist[u] + cost[a] < dist[v]:
+                    dist[v] = dist[u] + cost[a]
+                    if not queued[v]:
+                        queued[v] = True
+                        queue.append(v)
+        return [d if d < inf else 0 for d in dist]
+
+    def min_cost_flow(self, s, t, limit=float('inf')):
+        """ Send as much flow as possible from s to t (at most limit) at minimum
+        total cost. Return (flow, cost). Negative-cost cycles are not supported. """
+        self._res = list(self._cap)
+        n, adj, to, res, cost = self._n, self._adj, self._to, self._res, self._cost
+        inf = float('inf')
+        potential = (self._initial_potentials(s) if any(c < 0 for c in cost[::2])
+                     else [0] * n)
+        flow = total = 0
+        while flow < limit:
+            # Dijkstra on reduced costs cost[a] + potential[u] - potential[v] >= 0
+            dist = [inf] * n
+            via = [-1] * n                  # arc used to reach each vertex
+            done = [False] * n
+            dist[s] = 0
+            pq = [(0, s)]
+            while pq:
+                d, u = heapq.heappop(pq)
+                if done[u]:                 # stale entry
+                    continue
+                done[u] = True
+                if u == t:                  # the rest of the search is not needed
+                    break
+                for a in adj[u]:
+                    if res[a] > 0:
+                        v = to[a]
+                        nd = d + cost[a] + potential[u] - potential[v]
+                        if nd < dist[v]:
+                            dist[v] = nd
+                            via[v] = a
+                            heapq.heappush(pq, (nd, v))
+            if dist[t] == inf:
+                break
+            # vertices left unsettled get the distance of t, which keeps every
+            # reduced cost non-negative for the next search
+            for v in range(n):
+                potential[v] += dist[v] if done[v] else dist[t]
+            # bottleneck of the cheapest path, then push flow along it
+            push = limit - flow
+            v = t
+            while v != s:
+                a = via[v]
+                push = min(push, res[a])
+                v = to[a ^ 1]
+            v = t
+            while v != s:
+                a = via[v]
+                res[a] -= push
+                res[a ^ 1] += push
+                v = to[a ^ 1]
+            flow += push
+            total += push * (potential[t] - potential[s])
+        return flow, total
+
+
+if __name__ == '__main__':
+    # jobs 1..J to workers J+1..J+W with a cost for each compatible pair;
+    # source 0 and sink J+W+1
+    rnd = random.Random(7)
+    J = W = 1000
+    s, t = 0, J + W + 1
+    pairs = [(j, J + w, rnd.randint(1, 50))
+             for j in range(1, J + 1) for w in rnd.sample(range(1, W + 1), 5)]
+    edges = ([(s, j, 1, 0) for j in range(1, J + 1)] + [(j, w, 1, c) for j, w, c in pairs] +
+             [(J + w, t, 1, 0) for w in range(1, W + 1)])
+
+    start = time.perf_counter()
+    network = MinCostFlowNetwork.from_edges(t + 1, edges)
+    flow, cost = network.min_cost_flow(s, t)
+    print('Min-cost assignment: %d jobs, cost %d (%.2f s)' % (flow, cost, time.perf_counter() - start))
+
+    start = time.perf_counter()
+    g = Graph.from_edges(t + 1, [(u, v, c) for u, v, c, _ in edges])
+    print('Ford-Fulkerson assignment: %d jobs, cost ignored (%.2f s)'
+          % (g.ford_fulkerson(s, t), time.perf_counter() - start))
@@ -1,4 +1,7 @@
+import json
 import os
+import queue
+from concurrent.futures import ThreadPoolExecutor
 
 
 def factorial(n):
@@ -35,7 +38,173 @@ def diskUsage(path):
             # add child's usage to total
             total += diskUsage(childpath)
     # describe output (optional)
-    print('{0 :< 7}'.format(total), path)
+    print('{0:<7}'.format(total), path)
     return total                                       # return the grand total
 
 
+
+
+def _scanDirectory(path, files):
+    """ Scan one directory with os.scandir and return (bytes of the files directly
+    in it, [(subdirectory, own size)], [(file, size)] if files is true). Sizes come
+    from the stat results scandir caches, so no extra system call per name. """
+    direct = 0
+    subdirs = []
+    listed = []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    size = entry.stat(follow_symlinks=False).st_size
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append((entry.path, size))
+                    else:
+                        direct += size
+                        if files:
+                            listed.append((entry.path, size))
+                except OSError:                 # vanished or unreadable entry
+                    continue
+    except OSError:                             # unreadable directory counts as empty
+        pass
+    return direct, subdirs, listed
+
+
+def scanDiskUsage(path, max_depth=None, min_size=0, files=False, workers=None):
+    """ Generate (path, bytes, depth) for a folder and its descendents, like
+    diskUsage but without recursion or printing.
+
+    Directories are scanned concurrently on a thread pool and their totals are
+    aggregated bottom-up, so a directory is reported as soon as its whole subtree
+    is summed: children always come before their parent and path itself is last.
+    Only entries with depth <= max_depth (path has depth 0) and bytes >= min_size
+    are reported; files are reported too when files is true. Symbolic links are
+    counted by their own size and not followed.
+    """
+    size = os.path.getsize(path)
+    if not os.path.isdir(path):
+        if size >= min_size:
+            yield path, size, 0
+        return
+    # per directory: [parent, children still to finish (None until scanned), total, depth]
+    pending = {path: [None, None, size, 0]}
+    done = queue.SimpleQueue()
+    pool = ThreadPoolExecutor(workers)
+
+    def submit(folder):
+        future = pool.submit(_scanDirectory, folder, files)
+        future.add_done_callback(lambda f: done.put((folder, f)))
+
+    try:
+        submit(path)
+        running = 1
+        while running:
+            folder, future = done.get()
+            running -= 1
+            direct, subdirs, listed = future.result()
+            node = pending[folder]
+            node[1] = len(subdirs)
+            node[2] += direct
+            depth = node[3] + 1
+            if max_depth is None or depth <= max_depth:
+                for name, size in listed:
+                    if size >= min_size:
+                        yield name, size, depth
+            for name, size in subdirs:
+                pending[name] = [folder, None, size, depth]
+                submit(name)
+                running += 1
+            while node[1] == 0:                 # subtree complete: report, then fold into parent
+                del pending[folder]
+                parent, _, total, depth = node
+                if (max_depth is None or depth <= max_depth) and total >= min_size:
+                    yield folder, total, depth
+                if parent is None:
+                    break
+                folder, node = parent, pending[parent]
+                node[1] -= 1
+                node[2] += total
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+class DiskUsageIndex:
+    """ Persistent disk usage index of a folder.
+
+    For every directory the index keeps its modification time, the bytes used
+    by the directory itself and its files, its subdirectories and its subtree
+    total. refresh() only rescans directories whose mtime changed; the others
+    cost a single stat. A directory's mtime changes when entries are added,
+    removed or renamed, not when an existing file grows, so refresh(full=True)
+    is still needed now and then to pick up in-place edits.
+    """
+
+    def __init__(self, root):
+        self._root = os.path.abspath(root)
+        self._dirs = {}                 # path -> [mtime_ns, own bytes, [subdirs], total]
+        self._order = []                # paths by total, largest first
+
+    @staticmethod
+    def _check(path, record, full):
+        """ Return an up-to-date record for path (reusing record if its mtime is
+        unchanged) and whether it was rescanned, or (None, False) if path is gone. """
+        try:
+            st = os.stat(path, follow_symlinks=False)
+        except OSError:
+            return None, False
+        if record is not None and not full and record[0] == st.st_mtime_ns:
+            return record, False
+        direct, subdirs, _ = _scanDirectory(path, False)
+        return [st.st_mtime_ns, st.st_size + direct, [name for name, _ in subdirs], 0], True
+
+    def refresh(self, full=False, workers=None):
+        """ Bring the index up to date and return the number of directories rescanned. """
+        old, dirs, rescanned = self._dirs, {}, 0
+        levels = []
+        frontier = [self._root]
+        with ThreadPoolExecutor(workers) as pool:
+            while frontier:             # one level of the tree at a time
+                checked = pool.map(lambda path: self._check(path, old.get(path), full), frontier)
+                level = []
+                for path, (record, scanned) in zip(frontier, checked):
+                    if record is not None:
+                        dirs[path] = record
+                        level.append(path)
+                        rescanned += scanned
+                levels.append(level)
+                frontier = [name for path in level for name in dirs[path][2]]
+        for level in reversed(levels):  # totals bottom-up
+            for path in level:
+                record = dirs[path]
+                record[3] = record[1] + sum(dirs[name][3] for name in record[2] if name in dirs)
+        self._dirs = dirs
+        self._order = sorted(dirs, key=lambda path: dirs[path][3], reverse=True)
+        return rescanned
+
+    def usage(self, path):
+        """ Return the indexed number of bytes used by directory path. """
+        path = os.path.abspath(path)
+        if path not in self._dirs:
+            raise KeyError('Key Error: ' + repr(path))
+        return self._dirs[path][3]
+
+    def top(self, n):
+        """ Return [(path, bytes)] for the n largest indexed subtrees. """
+        return [(path, self._dirs[path][3]) for path in self._order[:n]]
+
+    def __len__(self):
+        return len(self._dirs)
+
+    def save(self, filename):
+        """ Write the index to a JSON file. """
+        with open(filename, 'w') as f:
+            json.dump({'root': self._root, 'dirs': self._dirs}, f)
+
+    @classmethod
+    def load(cls, filename):
+        """ Read an index written by save(); call refresh() to update it. """
+        with open(filename) as f:
+            data = json.load(f)
+        index = cls(data['root'])
+        index._dirs = data['dirs']
+        index._order = sorted(index._dirs, key=lambda path: index._dirs[path][3], reverse=True)
+        return index
@@ -1,6 +1,23 @@
-from copy import deepcopy
+import csv
+import heapq
+import mmap
+import os
+import pickle
+import struct
+import sys
+import tempfile
+from array import array
+from multiprocessing import Pool
 from .AdaptablePriorityQueue import AdaptableHeap
-from .Heap import HeapPriorityQueue
+
+
+class CycleError(Exception):
+    """ Error raised when a directed acyclic graph was expected but g has a cycle.
+    The offending cycle is available as a list of vertices in the cycle attribute. """
+
+    def __init__(self, message, cycle):
+        super().__init__(message)
+        self.cycle = cycle
 
 
 class Partition:
@@ -31,10 +48,12 @@ class Partition:
 
     def find(self, p):
         """ Find the group containing p and return the position of its leader. """
-        if p._parent != p:
-            # overwrite p._parent after recursion
-            p._parent = self.find(p._parent)
-        return p._parent
+        while p._parent is not p:
+            # path halving: point p at its grandparent while walking up,
+            # so no recursion is needed however long the chain is
+            p._parent = p._parent._parent
+            p = p._parent
+        return p
 
     
     def union(self, p, q):
@@ -49,6 +68,40 @@ class Partition:
                 a._parent = b
                 b._size += a._size
 
+
+class ArrayPartition:
+    """ Union-find over the integers 0..n-1, with parents kept in a flat array. """
+    __slots__ = '_parent', '_rank'
+
+    def __init__(self, n):
+        """ Create n singleton groups. """
+        self._parent = array('i', range(n))
+        self._rank = bytearray(n)           # upper bound on height of each tree
+
+    def find(self, i):
+        """ Return the leader of the group containing i (with path halving). """
+        parent = self._parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(self, i, j):
+        """ Merge the groups containing i and j (union by rank).
+        Return True if they were distinct groups. """
+        a = self.find(i)
+        b = self.find(j)
+        if a == b:
+            return False
+        rank = self._rank
+        if rank[a] < rank[b]:
+            a, b = b, a
+        self._parent[b] = a                 # attach shorter tree under taller
+        if rank[a] == rank[b]:
+            rank[a] += 1
+        return True
+
+
 class Graph:
     """ Representation of a simple graph using an adjency map. """
 
@@ -105,6 +158,22 @@ class Graph:
         self._outgoing = {}
         # only create second map for directed graph; use alias for undirected
         self._incoming = {} if directed else self._outgoing
+        self._edge_total = 0                # maintained by every edge update
+        self._observers = []                # callbacks told about edge changes
+
+    def add_observer(self, fn):
+        """ Register fn(kind, e, old) to be called after every edge change.
+        kind is 'insert' or 'remove' (old is None), or 'replace' when
+        replace_edge gave e a new element (old is the previous element). """
+        self._observers.append(fn)
+
+    def remove_observer(self, fn):
+        """ Stop calling fn on edge changes. """
+        self._observers.remove(fn)
+
+    def _notify(self, kind, e, old=None):
+        for fn in self._observers:
+            fn(kind, e, old)
 
     def is_directed(self):
         """ Return True if this a directed graph; False if undirected.
@@ -121,16 +190,16 @@ class Graph:
 
     def edge_count(self):
         """ Return the number of edges in the graph. """
-        total = sum(len(self._outgoing[v]) for v in self._outgoing)
-        # for undirected graphs, make sure not to double-count edges
-        return total if self.is_directed() else total // 2
+        return self._edge_total
 
     def edges(self):
-        """ Return a set of all edges of the graph. """
-        result = set()      # avoid double reporting edges of undirected graph
-        for secondary_map in self._outgoing.values():
-            result.update(secondary_map.values())   # add edges to resulting set
-        return result 
+        """ Generate all edges of the graph, each exactly once. """
+        for u, secondary_map in self._outgoing.items():
+            for e in secondary_map.values():
+                # an undirected edge also sits in the map of its destination;
+                # report it only from the map of its origin
+                if e._origin is u:
+                    yield e
 
     def get_edge(self, u, v):
         """ Return the edge from u to v, or None if not adjacent. """
@@ -165,10 +234,17 @@ class Graph:
         return v
 
     def insert_edge(self, u, v, x=None):
-        """ Insert and return a new Edge from u to v with auxiliary element x. """
+        """ Insert and return a new Edge from u to v with auxiliary element x.
+        An existing edge from u to v is removed first (observers see it go). """
+        old = self._outgoing[u].get(v)
+        if old is not None:
+            self.remove_edge(old)
         e = self.Edge(u, v, x)
+        self._edge_total += 1
         self._outgoing[u][v] = e
         self._incoming[v][u] = e
+        if self._observers:
+            self._notify('insert', e)
         return e
 
     def remove_edge(self, e):
@@ -176,21 +252,373 @@ class Graph:
         u, v = e.endpoints()
         elem = self.get_edge(u, v).element()
         del self._outgoing[u][v]
-        del self._incoming[v][u]
+        self._incoming[v].pop(u, None)      # gone already for an undirected self-loop
+        self._edge_total -= 1
+        if self._observers:
+            self._notify('remove', e)
         return elem
 
+    def replace_edge(self, e, x):
+        """ Replace the element of edge e with x and return the old element. """
+        old = e._element
+        e._element = x
+        if self._observers:
+            self._notify('replace', e, old)
+        return old
+
     def remove_vertex(self, v):
-        """ Remove vertex and return its element. """
+        """ Remove vertex and return its element.
+        Runs in time proportional to the degree of v: each neighbor loses its
+        entry for v directly, through the adjacency maps of v. """
         elem = v.element()
-        outgoing_edges = list(self.incident_edges(v))
-        incoming_edges = list(self.incident_edges(v, outgoing=False))
-        for e_out in outgoing_edges:
-            self.remove_edge(e_out)
-        for e_in in incoming_edges:
-            self.remove_edge(e_in)
-        self._outgoing.pop(v)
-        self._incoming.pop(v)
-        return elem    
+        directed = self.is_directed()
+        if self._observers:
+            # remove edges one at a time so observers see a consistent graph
+            edges = list(self._outgoing[v].values())
+            if directed:
+                edges += [e for w, e in self._incoming[v].items() if w is not v]
+            for e in edges:
+                self.remove_edge(e)
+        outgoing = self._outgoing.pop(v)
+        incoming = self._incoming.pop(v) if directed else outgoing
+        for w in outgoing:
+            if w is not v:                  # a self-loop lives in v's own map
+                del self._incoming[w][v]
+        self._edge_total -= len(outgoing)
+        if directed:
+            for w in incoming:
+                if w is not v:
+                    del self._outgoing[w][v]
+                    self._edge_total -= 1
+        return elem
+
+    @classmethod
+    def from_edges(cls, edges, directed=False):
+        """ Build a graph from an iterable of (a, b) or (a, b, x) tuples, where a and b
+        are vertex elements and x is the edge element (None if omitted).
+        Vertices are created the first time their element is seen. The iterable
+        is consumed lazily, so a generator reading a file is never materialized.
+        Return (graph, vertices) with vertices mapping each element to its Vertex. """
+        g = cls(directed)
+        outgoing, incoming = g._outgoing, g._incoming
+        Vertex, Edge = cls.Vertex, cls.Edge
+        vertices = {}
+        # bypass insert_vertex/insert_edge: bind everything locally and write
+        # straight into the adjacency maps
+        for item in edges:
+            a, b = item[0], item[1]
+            x = item[2] if len(item) > 2 else None
+            u = vertices.get(a)
+            if u is None:
+                u = vertices[a] = Vertex(a)
+                outgoing[u] = {}
+                if directed:
+                    incoming[u] = {}
+            v = vertices.get(b)
+            if v is None:
+                v = vertices[b] = Vertex(b)
+                outgoing[v] = {}
+                if directed:
+                    incoming[v] = {}
+            e = Edge(u, v, x)
+            if v not in outgoing[u]:
+                g._edge_total += 1
+            outgoing[u][v] = e
+            incoming[v][u] = e
+        return g, vertices
+
+    @classmethod
+    def from_adjacency_matrix(cls, matrix, directed=False, missing=0):
+        """ Build a graph from a square matrix (list of rows) of edge elements.
+        Vertex i stores element i; matrix[i][j] != missing creates edge (i, j) with
+        that element. For an undirected graph only the upper triangle is read.
+        Return (graph, vertices) with vertices a list indexed by row number. """
+        g = cls(directed)
+        outgoing, incoming = g._outgoing, g._incoming
+        Edge = cls.Edge
+        vertices = [cls.Vertex(i) for i in range(len(matrix))]
+        for v in vertices:
+            outgoing[v] = {}
+            if directed:
+                incoming[v] = {}
+        for i, row in enumerate(matrix):
+            u = vertices[i]
+            for j in range(0 if directed else i, len(row)):
+                x = row[j]
+                if x != missing:
+                    v = vertices[j]
+                    e = Edge(u, v, x)
+                    outgoing[u][v] = e
+                    incoming[v][u] = e
+                    g._edge_total += 1
+        return g, vertices
+
+    @classmethod
+    def from_csv(cls, path, directed=False, element=float, delimiter=',', header=False):
+        """ Build a graph from a CSV file with rows 'source, target[, element]'.
+        The file is streamed row by row; element converts the third column
+        (use None to keep it as a string). Skip the first row if header is True.
+        Return (graph, vertices) as for from_edges. """
+        with open(path, newline='') as f:
+            rows = (r for r in csv.reader(f, delimiter=delimiter) if r)    # skip blank lines
+            if header:
+                next(rows, None)
+            if element is None:
+                return cls.from_edges(rows, directed)
+            return cls.from_edges(((r[0], r[1], element(r[2])) if len(r) > 2 else r
+                                   for r in rows), directed)
+
+    def freeze(self, weighted=True):
+        """ Return a read-only CSRGraph snapshot of the current graph.
+        If weighted is True, every edge element must be numeric and is packed
+        as the edge weight; otherwise edge elements are dropped. """
+        return CSRGraph(self, weighted)
+
+
+class CSRGraph:
+    """ Read-only compressed sparse row (CSR) snapshot of a Graph.
+
+    Vertices are packed into integer ids 0..n-1 and the adjacency of vertex u
+    is the slice targets[offsets[u]:offsets[u+1]] of flat arrays, so a hop costs
+    two array reads instead of a dict lookup and an Edge object.
+    Use Graph's freeze() to build one; vertex(i) and index(v) translate ids. """
+
+    # nested Edge class
+    class Edge:
+        """ Lightweight edge handle, only created when an algorithm reports an edge. """
+        __slots__ = '_origin', '_destination', '_element'
+
+        def __init__(self, u, v, x):
+            self._origin = u
+            self._destination = v
+            self._element = x
+
+        def endpoints(self):
+            """ Return (u, v) tuple of vertex ids. """
+            return (self._origin, self._destination)
+
+        def opposite(self, v):
+            """ Return the vertex id that is opposite v on the edge. """
+            return self._destination if v == self._origin else self._origin
+
+        def element(self):
+            """ Return the weight of the edge (None for an unweighted snapshot). """
+            return self._element
+
+        def __hash__(self):
+            return hash((self._origin, self._destination))
+
+        def __eq__(self, other):
+            if not isinstance(other, CSRGraph.Edge):
+                return NotImplemented
+            return (self._origin, self._destination) == (other._origin, other._destination)
+
+    def __init__(self, g, weighted=True):
+        """ Do not call constructor directly. Use Graph's freeze(). """
+        self._vertices = list(g.vertices())             # id -> original Vertex
+        self._index = {v: i for i, v in enumerate(self._vertices)}
+        self._directed = g.is_directed()
+        self._loops = None                              # undirected self-loops, counted on demand
+        n = len(self._vertices)
+        code = 'i' if n < 2 ** 31 else 'q'              # 4 bytes per target when possible
+        self._offsets, self._targets, self._weights = self._pack(g, True, code, weighted)
+        if self._directed:
+            # reverse adjacency, so incoming queries are as cheap as outgoing ones
+            self._in_offsets, self._in_targets, self._in_weights = self._pack(g, False, code, weighted)
+        else:
+            # undirected: both directions are already stored; use aliases
+            self._in_offsets = self._offsets
+            self._in_targets = self._targets
+            self._in_weights = self._weights
+
+    def _pack(self, g, outgoing, code, weighted):
+        """ Build (offsets, targets, weights) arrays for one direction of g. """
+        index = self._index
+        offsets = array('q', [0])
+        targets = array(code)
+        weights = array('d') if weighted else None
+        adj = g._outgoing if outgoing else g._incoming
+        for v in self._vertices:
+            secondary = adj[v]
+            targets.extend(index[w] for w in secondary)
+            if weighted:
+                try:
+                    weights.extend(e._element for e in secondary.values())
+                except TypeError:
+                    raise TypeError('edge elements must be numeric; use freeze(weighted=False)')
+            offsets.append(len(targets))
+        return offsets, targets, weights
+
+    def is_directed(self):
+        """ Return True if the snapshot was taken from a directed graph. """
+        return self._directed
+
+    def is_weighted(self):
+        """ Return True if edge weights were packed into the snapshot. """
+        return self._weights is not None
+
+    def vertex_count(self):
+        """ Return the number of vertices in the graph. """
+        return len(self._vertices)
+
+    def vertices(self):
+        """ Return an iteration of all vertex ids of the graph. """
+        return range(len(self._vertices))
+
+    def vertex(self, i):
+        """ Return the original Vertex with id i. """
+        return self._vertices[i]
+
+    def index(self, v):
+        """ Return the id of the original Vertex v. """
+        return self._index[v]
+
+    def edge_count(self):
+        """ Return the number of edges in the graph. """
+        total = len(self._targets)
+        if self._directed:
+            return total
+        # undirected edges are stored once per endpoint, except self-loops,
+        # which are stored once
+        if self._loops is None:
+            offsets, targets = self._offsets, self._targets
+            self._loops = sum(1 for u in range(len(self._vertices))
+                              for j in range(offsets[u], offsets[u + 1]) if targets[j] == u)
+        return (total + self._loops) // 2
+
+    def edges(self):
+        """ Generate every edge of the graph once, as CSRGraph.Edge handles. """
+        offsets, targets = self._offsets, self._targets
+        for u in range(len(self._vertices)):
+            for j in range(offsets[u], offsets[u + 1]):
+                v = targets[j]
+                if self._directed or u <= v:        # avoid double reporting
+                    yield self._edge(u, j)
+
+    def get_edge(self, u, v):
+        """ Return the edge from u to v, or None if not adjacent. """
+        for j in range(self._offsets[u], self._offsets[u + 1]):
+            if self._targets[j] == v:
+                return self._edge(u, j)
+        return None
+
+    def degree(self, v, outgoing=True):
+        """ Return number of (outgoing) edges incident to vertex v. """
+        offsets = self._offsets if outgoing else self._in_offsets
+        return offsets[v + 1] - offsets[v]
+
+    def neighbors(self, v, outgoing=True):
+        """ Return the (outgoing) neighbor ids of vertex v as a slice of the target
+        array: an array, or a read-only memoryview for a memory-mapped snapshot. """
+        if outgoing:
+            return self._targets[self._offsets[v]:self._offsets[v + 1]]
+        return self._in_targets[self._in_offsets[v]:self._in_offsets[v + 1]]
+
+    def incident_edges(self, v, outgoing=True):
+        """ Generate all (outgoing) edges incident to vertex v. """
+        offsets = self._offsets if outgoing else self._in_offsets
+        for j in range(offsets[v], offsets[v + 1]):
+            yield self._edge(v, j, outgoing)
+
+    def incident_vertices(self, v, outgoing=True):
+        """ Generate all (outgoing) vertices incident to vertex v. """
+        for w in self.neighbors(v, outgoing):
+            yield w
+
+    def _edge(self, u, j, outgoing=True):
+        """ Return an Edge handle for slot j of the adjacency of u. """
+        if outgoing:
+            w = self._weights[j] if self._weights is not None else None
+            return self.Edge(u, self._targets[j], w)
+        w = self._in_weights[j] if self._in_weights is not None else None
+        return self.Edge(self._in_targets[j], u, w)
+
+    def _require_weights(self):
+        if self._weights is None:
+            raise ValueError('snapshot has no weights; use freeze(weighted=True)')
+
+    # binary file layout: a fixed header, then each array padded to 8 bytes,
+    # then the pickled list of vertex elements
+    _MAGIC = b'CSRG'
+    _HEADER = struct.Struct('<4sBBBBqqq')   # magic, version, directed, weighted,
+                                            # little-endian, n, m, elements size
+
+    def save(self, path):
+        """ Write the snapshot to a binary file that load() can memory-map. """
+        elements = pickle.dumps([v.element() for v in self._vertices])
+        weighted = self._weights is not None
+        with open(path, 'wb') as f:
+            f.write(self._HEADER.pack(self._MAGIC, 1, self._directed, weighted,
+                                      sys.byteorder == 'little', len(self._vertices),
+                                      len(self._targets), len(elements)))
+            for data in self._sections():
+                f.write(data)
+                f.write(bytes(-f.tell() % 8))   # keep every section 8-aligned
+            f.write(elements)
+
+    def _sections(self):
+        """ Return the arrays stored in a file, in file order. """
+        sections = [self._offsets, self._targets]
+        if self._weights is not None:
+            sections.append(self._weights)
+        if self._directed:
+            sections += [self._in_offsets, self._in_targets]
+            if self._in_weights is not None:
+                sections.append(self._in_weights)
+        return sections
+
+    @classmethod
+    def load(cls, path, use_mmap=True):
+        """ Open a snapshot written by save().
+        With use_mmap=True (the default) the arrays are zero-copy views into a
+        read-only memory map of the file, so opening costs O(vertices) no matter
+        how many edges there are; pages are read by the OS as traversals touch them.
+        Otherwise the arrays are read into memory.
+        Warning: vertex elements are stored with pickle, so loading a file runs
+        whatever code it contains. Never load a snapshot from an untrusted source. """
+        with open(path, 'rb') as f:
+            if use_mmap:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                buffer = f.read()
+        magic, version, directed, weighted, little, n, m, size = cls._HEADER.unpack_from(buffer)
+        if magic != cls._MAGIC or version != 1:
+            raise ValueError('not a CSRGraph file: ' + repr(path))
+        if little != (sys.byteorder == 'little'):
+            raise ValueError('CSRGraph file was written with a different byte order')
+        view = memoryview(buffer)
+        position = cls._HEADER.size
+
+        def section(code, count):
+            nonlocal position
+            position += -position % 8
+            width = struct.calcsize(code)
+            data = view[position:position + count * width]
+            position += count * width
+            if use_mmap:
+                return data.cast(code)
+            copy = array(code)
+            copy.frombytes(data)                # one bulk copy, not element by element
+            return copy
+
+        code = 'i' if n < 2 ** 31 else 'q'
+        g = cls.__new__(cls)
+        g._directed = bool(directed)
+        g._loops = None
+        g._offsets = section('q', n + 1)
+        g._targets = section(code, m)
+        g._weights = section('d', m) if weighted else None
+        if directed:
+            g._in_offsets = section('q', n + 1)
+            g._in_targets = section(code, m)
+            g._in_weights = section('d', m) if weighted else None
+        else:
+            g._in_offsets, g._in_targets, g._in_weights = g._offsets, g._targets, g._weights
+        position += -position % 8
+        g._vertices = [Graph.Vertex(x) for x in pickle.loads(view[position:position + size])]
+        g._index = {v: i for i, v in enumerate(g._vertices)}
+        g._buffer = buffer                  # keep the memory map alive
+        return g
 
 
 def DFS(g, u, discovered):
@@ -198,11 +626,36 @@ def DFS(g, u, discovered):
     discovered is a dictionary mapping each vertex to the edge that was used to
     discover it during the DFS (u should be "discoverd" prior to the call).
     Newly discovered vertices will be added to the dictionary as a result. """
-    for e in g.incident_edges(u):   # for every outgoing edge from u
-        v = e.opposite(u)                                                   
-        if v not in discovered:     # v is an unvisited edge
-            discovered[v] = e       # e is the tree edge that discovered v
-            DFS(g, v, discovered)   # recursively explore from v
+    if isinstance(g, CSRGraph):
+        return _DFS_csr(g, u, discovered)
+    # an explicit stack of edge iterators replaces recursion, so the depth of
+    # the search is not bounded by the interpreter recursion limit
+    stack = [(u, g.incident_edges(u))]
+    while stack:
+        w, edges = stack[-1]
+        for e in edges:                 # resume scanning edges of w
+            v = e.opposite(w)
+            if v not in discovered:     # v is an unvisited vertex
+                discovered[v] = e       # e is the tree edge that discovered v
+                stack.append((v, g.incident_edges(v)))
+                break                   # explore from v before finishing w
+        else:
+            stack.pop()                 # every edge of w has been examined
+
+def _DFS_csr(g, u, discovered):
+    """ DFS on a CSRGraph, walking the flat arrays with an explicit stack. """
+    offsets, targets = g._offsets, g._targets
+    stack = [(u, offsets[u])]           # (vertex, next slot to examine)
+    while stack:
+        w, j = stack[-1]
+        if j == offsets[w + 1]:         # every edge of w examined
+            stack.pop()
+            continue
+        stack[-1] = (w, j + 1)
+        v = targets[j]
+        if v not in discovered:
+            discovered[v] = g._edge(w, j)
+            stack.append((v, offsets[v]))
 
 
 def construct_path(u, v, discovered):
@@ -212,7 +665,7 @@ def construct_path(u, v, discovered):
         # we build list from v to u and then reverse it at the end
         path.append(v)
         walk = v
-        while walk is not u:
+        while walk != u:
             e = discovered[walk]    # find edge leading to walk
             parent = e.opposite(walk)
             path.append(parent)
@@ -227,16 +680,65 @@ def DFS_complete(g):
     (Vertices that are root of a DFS tree are mapped to None). """
     forest = {}
     for u in g.vertices():
-        if u not in forest():
+        if u not in forest:
             forest[u] = None    # u will be the root of the tree
             DFS(g, u, forest)
     return forest
 
+
+def DFS_events(g, u=None):
+    """ Generate the events of a DFS of g, without recursion.
+    If u is given only the portion reachable from u is explored; otherwise every
+    vertex is used as a root in turn (as DFS_complete does).
+    Each event is a tuple (kind, x, e):
+        ('pre', v, e)       v is discovered through edge e (None for a root)
+        ('post', v, e)      every edge of v has been explored
+        ('tree', u, e)      e leads from u to a newly discovered vertex
+        ('back', u, e)      e leads from u to an ancestor still on the stack
+        ('forward', u, e)   e leads from u to an already finished descendant
+        ('cross', u, e)     e leads from u to a finished vertex of another branch
+    Forward and cross edges only occur in directed graphs; in an undirected graph
+    every non-tree edge is reported once, as a back edge. """
+    directed = g.is_directed()
+    order = {}                          # discovery number of each vertex
+    finished = set()
+    roots = g.vertices() if u is None else [u]
+    for root in roots:
+        if root in order:
+            continue
+        order[root] = len(order)
+        yield ('pre', root, None)
+        stack = [(root, None, None, g.incident_edges(root))]
+        while stack:
+            w, parent, via, edges = stack[-1]
+            for e in edges:
+                v = e.opposite(w)
+                if v not in order:
+                    yield ('tree', w, e)
+                    order[v] = len(order)
+                    yield ('pre', v, e)
+                    stack.append((v, w, e, g.incident_edges(v)))
+                    break
+                if not directed and (v == parent or v in finished):
+                    continue            # edge already reported from its other end
+                if v not in finished:
+                    yield ('back', w, e)
+                elif order[w] < order[v]:
+                    yield ('forward', w, e)
+                else:
+                    yield ('cross', w, e)
+            else:
+                stack.pop()
+                finished.add(w)
+                yield ('post', w, via)
+
 def BFS(g, s, discovered):
     """ Perform BFS of the undiscovered protion of the Graph g starting at Vertex s.
     discovered is a dictionary mapping each vertex to the edge that was used to 
     discover it during the BFS (s should be mapped to None prior to the call).
     Newly discovered vertices will be added to the dictionary as a result. """
+    if isinstance(g, CSRGraph):
+        return _BFS_csr(g, s, discovered)
     level = [s]             # first level include only s
     while len(level) > 0:
         next_level = []     # prepare to gather newly found vertices
@@ -250,52 +752,435 @@ def BFS(g, s, discovered):
         level = next_level      # relabel 'next' level to become current
 
 
+def _BFS_csr(g, s, discovered):
+    """ BFS on a CSRGraph, scanning each adjacency slice of the flat arrays. """
+    offsets, targets = g._offsets, g._targets
+    level = [s]
+    while level:
+        next_level = []
+        for u in level:
+            for j in range(offsets[u], offsets[u + 1]):
+                v = targets[j]
+                if v not in discovered:
+                    discovered[v] = g._edge(u, j)
+                    next_level.append(v)
+        level = next_level
+
+
+
+def multi_source_BFS(g, sources):
+    """ Compute hop distances from every vertex id in sources, on a CSRGraph.
+    All sources are explored together: each vertex keeps a Python int bitset of
+    the sources that reached it, so one scan of an edge advances every BFS that
+    crosses it. Each level is expanded top-down (frontier scans its outgoing
+    edges) or bottom-up (unfinished vertices scan their incoming edges for a
+    frontier parent), whichever is expected to touch fewer edges.
+    Return a list of array('i') rows, one per source, where row[v] is the number
+    of hops from that source to v, or -1 if v is unreachable. """
+    n = g.vertex_count()
+    offsets, targets = g._offsets, g._targets
+    in_offsets, in_targets = g._in_offsets, g._in_targets
+    dist = [array('i', [-1]) * n for _ in sources]
+    seen = [0] * n                          # bitset of sources that reached v
+    frontier = {}                           # vertex -> sources reaching it now
+    for i, s in enumerate(sources):
+        seen[s] |= 1 << i
+        frontier[s] = frontier.get(s, 0) | 1 << i
+        dist[i][s] = 0
+    full = (1 << len(sources)) - 1
+    unexplored = len(in_targets)            # incoming slots of unfinished vertices
+    bottom_up = False
+    level = 0
+    while frontier:
+        level += 1
+        # direction-optimizing switch (alpha = 14, beta = 24 after Beamer et al.)
+        if bottom_up:
+            bottom_up = len(frontier) >= n // 24
+        else:
+            scout = sum(offsets[v + 1] - offsets[v] for v in frontier)
+            bottom_up = scout > unexplored // 14
+        found = {}
+        if bottom_up:
+            for w in range(n):
+                missing = full & ~seen[w]
+                if missing:
+                    acc = 0
+                    for v in in_targets[in_offsets[w]:in_offsets[w + 1]]:
+                        acc |= frontier.get(v, 0)
+                        if acc & missing == missing:
+                            break           # nothing left to learn for w
+                    if acc & missing:
+                        found[w] = acc & missing
+        else:
+            for v, mask in frontier.items():
+                for w in targets[offsets[v]:offsets[v + 1]]:
+                    new = mask & ~seen[w]
+                    if new:
+                        seen[w] |= new
+                        found[w] = found.get(w, 0) | new
+        for w, new in found.items():
+            if bottom_up:
+                seen[w] |= new
+            if seen[w] == full:
+                unexplored -= in_offsets[w + 1] - in_offsets[w]
+            while new:
+                low = new & -new            # record w for each new source bit
+                dist[low.bit_length() - 1][w] = level
+                new ^= low
+        frontier = found
+    return dist
+
+
+_shared_snapshot = None                     # CSRGraph opened by each pool worker
+
+
+def _open_shared_snapshot(path):
+    global _shared_snapshot
+    _shared_snapshot = CSRGraph.load(path)
+
+
+def _multi_source_BFS_shared(sources):
+    return multi_source_BFS(_shared_snapshot, sources)
+
+
+def parallel_hop_distances(g, sources, processes=None, batch=64):
+    """ Compute multi_source_BFS(g, sources) with a multiprocessing pool.
+    g is saved once to a temporary file that every worker memory-maps, so the
+    snapshot is shared read-only instead of being copied to each process;
+    sources are sharded into batches of at most batch sources per task. """
+    sources = list(sources)
+    batches = [sources[i:i + batch] for i in range(0, len(sources), batch)]
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'snapshot.csr')
+        g.save(path)
+        with Pool(processes, initializer=_open_shared_snapshot, initargs=(path,)) as pool:
+            results = pool.map(_multi_source_BFS_shared, batches)
+    return [row for rows in results for row in rows]
+
 def floyd_warshall(g):
     """ Return a new graph that is the transitive closure of g. """
-    closure = deepcopy(g)           # imported from copy modules 
+    # build the copy directly; deepcopy would also copy g's observers
+    closure = Graph(g.is_directed())
     vertices = list(g.vertices())   # make indexable list
-    n = len(vertices)
-    for k in range(n):
-        for i in range(n):
-            # verify that edge (i, k) exists in the partial closure
-            if i != k and closure.get_edge(vertices[i], vertices[k]) is not None:
-                for j in range(n):
-                    # verify that edge (k, j) exits in the partial closure
-                    if i != j != k and closure.get_edge(vertices[k], vertices[j]) is not None:
-                        # if (i, j) not yet included, add it to the closure
-                        if closure.get_edge(vertices[i], vertices[j]) is None:
-                            closure.insert_edge(vertices[i], vertices[j])
+    copies = [closure.insert_vertex(v.element()) for v in vertices]    # same order as in g
+    position = {v: i for i, v in enumerate(vertices)}
+    for e in g.edges():
+        u, v = e.endpoints()
+        closure.insert_edge(copies[position[u]], copies[position[v]], e.element())
+    reach = transitive_closure(g)
+    # rather than probing get_edge O(n^3) times, only add the pairs that the
+    # reachability index reports and that are not already edges
+    for i, u in enumerate(vertices):
+        for v in reach.descendants(u):
+            j = position[v]
+            if i != j and closure.get_edge(copies[i], copies[j]) is None:
+                closure.insert_edge(copies[i], copies[j])
     return closure
 
 
+class ReachabilityIndex:
+    """ Compact answer to "is v reachable from u?" for a fixed graph.
+
+    Each strongly connected component (or each vertex, without condensation)
+    gets an integer id c, and rows[c] is a Python int used as a bitset whose bit d
+    is set when component d is reachable from component c. Build it with
+    transitive_closure(g). """
+
+    __slots__ = '_comp', '_rows', '_members'
+
+    def __init__(self, comp, rows, members):
+        """ Do not call constructor directly. Use transitive_closure(g). """
+        self._comp = comp               # vertex -> component id
+        self._rows = rows               # component id -> reachability bitset
+        self._members = members         # component id -> list of vertices
+
+    def reachable(self, u, v):
+        """ Return True if there is a path from u to v (always True if u is v). """
+        return (self._rows[self._comp[u]] >> self._comp[v]) & 1 == 1
+
+    def descendants(self, u):
+        """ Generate every vertex reachable from u, including u itself. """
+        bits = self._rows[self._comp[u]]
+        while bits:
+            low = bits & -bits          # isolate lowest set bit
+            for v in self._members[low.bit_length() - 1]:
+                yield v
+            bits ^= low
+
+
+def _adjacent_vertices(g, outgoing=True):
+    """ Return a function mapping vertex u to an iterable of its (outgoing) neighbors. """
+    if isinstance(g, CSRGraph):
+        return lambda u: g.neighbors(u, outgoing)
+    adj = g._outgoing if outgoing else g._incoming
+    return lambda u: adj[u]             # iterating a secondary map gives neighbors
+
+
+def _tarjan(g):
+    """ Iterative Tarjan algorithm. Return (comp, count) where comp maps every
+    vertex to the id of its strongly connected component; ids are assigned in
+    reverse topological order of the condensation (sink components first). """
+    if isinstance(g, CSRGraph):
+        return _tarjan_csr(g)
+    neighbors = _adjacent_vertices(g)
+    index = {}                          # discovery number of each vertex
+    low = {}                            # smallest index reachable from subtree
+    comp = {}
+    stack = []                          # vertices of components not yet emitted
+    count = 0
+    for root in g.vertices():
+        if root in index:
+            continue
+        index[root] = low[root] = len(index)
+        stack.append(root)
+        work = [(root, iter(neighbors(root)))]
+        while work:
+            u, it = work[-1]
+            for v in it:
+                if v not in index:      # tree edge: descend into v
+                    index[v] = low[v] = len(index)
+                    stack.append(v)
+                    work.append((v, iter(neighbors(v))))
+                    break
+                if v not in comp:       # v is still on the stack
+                    low[u] = min(low[u], index[v])
+            else:
+                work.pop()
+                if work:                # propagate low-link to the parent
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[u])
+                if low[u] == index[u]:  # u is the root of a component
+                    while True:
+                        w = stack.pop()
+                        comp[w] = count
+                        if w == u:
+                            break
+                    count += 1
+    return comp, count
+
+
+
+def _tarjan_csr(g):
+    """ _tarjan on a CSRGraph; all per-vertex state lives in flat arrays and comp
+    is returned as an array indexed by vertex id. """
+    offsets, targets = g._offsets, g._targets
+    n = g.vertex_count()
+    index = array('i', [-1]) * n
+    low = array('i', [0]) * n
+    comp = array('i', [-1]) * n
+    pos = array('q', offsets[:n])           # next slot to examine per vertex
+    stack = []
+    count = counter = 0
+    for root in range(n):
+        if index[root] >= 0:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        work = [root]
+        while work:
+            u = work[-1]
+            j, end = pos[u], offsets[u + 1]
+            while j < end:
+                v = targets[j]
+                j += 1
+                if index[v] < 0:            # tree edge: descend into v
+                    index[v] = low[v] = counter
+                    counter += 1
+                    stack.append(v)
+                    work.append(v)
+                    break
+                if comp[v] < 0 and index[v] < low[u]:
+                    low[u] = index[v]       # v is still on the stack
+            pos[u] = j
+            if work[-1] != u:               # descended; resume u later
+                continue
+            work.pop()
+            if work and low[u] < low[work[-1]]:
+                low[work[-1]] = low[u]
+            if low[u] == index[u]:
+                while True:
+                    w = stack.pop()
+                    comp[w] = count
+                    if w == u:
+                        break
+                count += 1
+    return comp, count
+
+
+def _component_items(comp):
+    """ Iterate (vertex, component id) pairs of a dict or array comp table. """
+    return comp.items() if isinstance(comp, dict) else enumerate(comp)
+
+
+def strongly_connected_components(g):
+    """ Compute the strongly connected components of g without recursion.
+    Return (comp, count): comp maps every vertex to a component id in
+    range(count), and ids follow a topological order of the condensation (an
+    edge between different components always goes to a larger id).
+    For a CSRGraph, comp is an array indexed by vertex id; otherwise a dict. """
+    comp, count = _tarjan(g)
+    last = count - 1
+    if isinstance(comp, dict):
+        return {v: last - c for v, c in comp.items()}, count
+    return array('i', (last - c for c in comp)), count
+
+
+def condensation(g, comp=None, count=None):
+    """ Return (dag, nodes), the condensation of g as a new directed Graph.
+    nodes[c] is the vertex of dag standing for component c, and its element is c.
+    There is one edge (c, d) whenever some edge of g joins component c to a
+    different component d; its element counts those edges.
+    comp and count may be given from an earlier strongly_connected_components(g). """
+    if comp is None:
+        comp, count = strongly_connected_components(g)
+    neighbors = _adjacent_vertices(g)
+    dag = Graph(directed=True)
+    nodes = [dag.insert_vertex(c) for c in range(count)]
+    for u, c in _component_items(comp):
+        for v in neighbors(u):
+            d = comp[v]
+            if c != d:
+                e = dag.get_edge(nodes[c], nodes[d])
+                if e is None:
+                    dag.insert_edge(nodes[c], nodes[d], 1)
+                else:
+                    e._element += 1
+    return dag, nodes
+
+def transitive_closure(g, condense=True):
+    """ Return a ReachabilityIndex describing the transitive closure of g.
+    With condense=True (the default) the strongly connected components are
+    found first and only the DAG of components is closed, in one pass of
+    word-parallel ORs in reverse topological order. With condense=False every
+    vertex gets its own bitset row and the closure is computed Warshall-style,
+    OR-ing whole rows instead of testing single pairs. """
+    neighbors = _adjacent_vertices(g)
+    if condense:
+        comp, count = _tarjan(g)
+        members = [[] for _ in range(count)]
+        for v, c in _component_items(comp):
+            members[c].append(v)
+        rows = [0] * count
+        for c in range(count):          # successors always have smaller ids
+            row = 1 << c
+            for u in members[c]:
+                for v in neighbors(u):
+                    row |= rows[comp[v]]    # rows[c] itself is still 0 here
+            rows[c] = row
+        return ReachabilityIndex(comp, rows, members)
+
+    vertices = list(g.vertices())
+    comp = {v: i for i, v in enumerate(vertices)}
+    rows = []
+    for i, u in enumerate(vertices):
+        row = 1 << i
+        for v in neighbors(u):
+            row |= 1 << comp[v]
+        rows.append(row)
+    for k in range(len(vertices)):
+        bit, row_k = 1 << k, rows[k]
+        for i in range(len(vertices)):
+            if rows[i] & bit:           # i reaches k, so i reaches all k reaches
+                rows[i] |= row_k
+    return ReachabilityIndex(comp, rows, [[v] for v in vertices])
+
+
 def topological_sort(g):
     """Return a list of vertices of directed acyclic graph g in topological order.
     If graph g has a cycle, the result will be incomplete."""
 
     topo = []       # a list of vertices placed in topological order
     ready = []      # list of vertices that have no remaining constraints
-    incount = []    # keep track of in-degree for each vertex
+    incount = {}    # keep track of in-degree for each vertex
     for u in g.vertices():
         incount[u] = g.degree(u, False)     # parameter requests incoming degree
         if incount[u] == 0:                 # if u has no incoming edges
             ready.append(u)                 # it is free of constraints
-        while len(ready) > 0:
-            u = ready.pop()                 # u is free of constraints
-            topo.append(u)                  # add u to the topological order
-            for e in g.incedent_edges(u):   
-                # consider all outgoing neighbors of u
-                v = e.opposite(u)
-                incount[v] -= 1         # v has one less constraint without u
-                if incount[v] == 0:
-                    ready.append(v)
+    while len(ready) > 0:
+        u = ready.pop()                     # u is free of constraints
+        topo.append(u)                      # add u to the topological order
+        for e in g.incident_edges(u):
+            # consider all outgoing neighbors of u
+            v = e.opposite(u)
+            incount[v] -= 1                 # v has one less constraint without u
+            if incount[v] == 0:
+                ready.append(v)
     return topo
 
 
+def topological_layers(g):
+    """ Return (topo, layer) for directed acyclic graph g, using Kahn's algorithm.
+    topo lists the vertices wave by wave; layer maps each vertex to its wave,
+    the length of the longest path reaching it, so all vertices of one wave are
+    independent of each other and can be processed concurrently.
+    Raise CycleError carrying a shortest cycle through one of the cyclic
+    vertices if g is not a DAG. """
+    neighbors = _adjacent_vertices(g)
+    incount = {}                            # remaining in-degree of each vertex
+    wave = []
+    for u in g.vertices():
+        incount[u] = g.degree(u, False)
+        if incount[u] == 0:
+            wave.append(u)
+    topo = []
+    layer = {}
+    depth = 0
+    while wave:
+        next_wave = []
+        for u in wave:
+            layer[u] = depth
+            topo.append(u)
+            for v in neighbors(u):
+                incount[v] -= 1
+                if incount[v] == 0:         # last constraint came from this wave
+                    next_wave.append(v)
+        wave = next_wave
+        depth += 1
+    if len(topo) < len(incount):
+        cycle = _find_cycle(g, [v for v in incount if v not in layer])
+        raise CycleError('graph has a cycle of length %d' % len(cycle), cycle)
+    return topo, layer
+
+
+def _find_cycle(g, remaining):
+    """ Return a shortest cycle through some vertex of the smallest cyclic
+    strongly connected component, among the vertices left over by Kahn. """
+    neighbors = _adjacent_vertices(g)
+    comp, count = _tarjan(g)
+    sizes = [0] * count
+    for v in remaining:
+        sizes[comp[v]] += 1
+    cyclic = [v for v in remaining
+              if sizes[comp[v]] > 1 or any(w == v for w in neighbors(v))]
+    start = min(cyclic, key=lambda v: sizes[comp[v]])
+    # BFS inside the component of start until an edge returns to start
+    parent = {start: None}
+    level = [start]
+    while level:
+        next_level = []
+        for u in level:
+            for v in neighbors(u):
+                if v == start:
+                    cycle = [u]
+                    while parent[cycle[-1]] is not None:
+                        cycle.append(parent[cycle[-1]])
+                    cycle.reverse()         # start ... u, then back to start
+                    return cycle
+                if v not in parent and comp[v] == comp[start]:
+                    parent[v] = u
+                    next_level.append(v)
+        level = next_level
+    return [start]                          # not reached: start lies on a cycle
+
+
 def shorted_path_lengths(g, src):
     """ Compute shorted-path distances from src to reachable vertices of g.
     Graph g can be undirected or directed, but must be weighted such that
     e.element() returns a numeric weight for edge e.
-    Return dictionary mapping each reachable vertex to its distance from src. """
+    Return dictionary mapping each vertex to its distance from src (infinity if unreachable). """
+    if isinstance(g, CSRGraph):
+        return _shorted_path_lengths_csr(g, src)
 
     d = {}                                  # d[v] is upper from s to v
     cloud = {}                              # map reachable v to its d[v] value
@@ -327,9 +1212,505 @@ def shorted_path_lengths(g, src):
     return cloud
 
 
+def _shorted_path_lengths_csr(g, src):
+    """ Dijkstra on a CSRGraph; stale heap entries are skipped on removal. """
+    g._require_weights()
+    offsets, targets, weights = g._offsets, g._targets, g._weights
+    d = {src: 0}
+    cloud = {}
+    pq = [(0, src)]
+    while pq:
+        key, u = heapq.heappop(pq)
+        if u in cloud:                      # stale entry for a finished vertex
+            continue
+        cloud[u] = key
+        for j in range(offsets[u], offsets[u + 1]):
+            v = targets[j]
+            if v not in cloud:
+                alt = key + weights[j]
+                if alt < d.get(v, float('inf')):
+                    d[v] = alt
+                    heapq.heappush(pq, (alt, v))
+    for v in range(g.vertex_count()):      # same shape as for a Graph
+        if v not in cloud:
+            cloud[v] = float('inf')
+    return cloud
+
+
+
+def dijkstra(g, src, target=None):
+    """ Compute shortest-path distances from src, pushing only reachable vertices.
+    The heap uses lazy deletion: a vertex may be pushed once per improvement and
+    stale entries are skipped when popped, so no locator bookkeeping is needed.
+    If target is given, the search stops as soon as the distance of target is final.
+    Return (cloud, pred): cloud maps each settled vertex to its distance and pred
+    maps it to the edge of its shortest-path tree (None for src), so that
+    construct_path(src, v, pred) rebuilds the path to v. """
+    if isinstance(g, CSRGraph):
+        return _dijkstra_csr(g, src, target)
+
+    outgoing = g._outgoing
+    d = {src: 0}                            # best known distance (upper bound)
+    pred = {src: None}
+    cloud = {}
+    pq = [(0, id(src), src)]                # id() breaks ties between vertices
+    while pq:
+        key, _, u = heapq.heappop(pq)
+        if u in cloud:                      # stale entry
+            continue
+        cloud[u] = key
+        if u is target:                     # early exit: target is settled
+            break
+        for v, e in outgoing[u].items():
+            if v not in cloud:
+                alt = key + e._element
+                if v not in d or alt < d[v]:
+                    d[v] = alt
+                    pred[v] = e
+                    heapq.heappush(pq, (alt, id(v), v))
+    return cloud, {v: pred[v] for v in cloud}
+
+
+def _dijkstra_csr(g, src, target):
+    """ dijkstra on a CSRGraph; edge handles are only built for improvements. """
+    g._require_weights()
+    offsets, targets, weights = g._offsets, g._targets, g._weights
+    d = {src: 0}
+    pred = {src: None}
+    cloud = {}
+    pq = [(0, src)]
+    while pq:
+        key, u = heapq.heappop(pq)
+        if u in cloud:
+            continue
+        cloud[u] = key
+        if u == target:
+            break
+        for j in range(offsets[u], offsets[u + 1]):
+            v = targets[j]
+            if v not in cloud:
+                alt = key + weights[j]
+                if v not in d or alt < d[v]:
+                    d[v] = alt
+                    pred[v] = (u, j)
+                    heapq.heappush(pq, (alt, v))
+    return cloud, {v: None if v == src else g._edge(*pred[v]) for v in cloud}
+
+
+def _weighted_adjacency(g, outgoing=True):
+    """ Return a function mapping vertex u to an iterable of (neighbor, weight). """
+    if isinstance(g, CSRGraph):
+        g._require_weights()
+        if outgoing:
+            offsets, targets, weights = g._offsets, g._targets, g._weights
+        else:
+            offsets, targets, weights = g._in_offsets, g._in_targets, g._in_weights
+        return lambda u: zip(targets[offsets[u]:offsets[u + 1]], weights[offsets[u]:offsets[u + 1]])
+    adj = g._outgoing if outgoing else g._incoming
+    return lambda u: ((v, e._element) for v, e in adj[u].items())
+
+
+def bidirectional_dijkstra(g, src, target):
+    """ Compute the shortest path from src to target by searching forward from
+    src and backward from target (along incoming edges) at the same time.
+    Return (distance, path) with path a list of vertices from src to target,
+    or (float('inf'), []) if target is not reachable. """
+    if src == target:
+        return 0, [src]
+    adjacency = (_weighted_adjacency(g, True), _weighted_adjacency(g, False))
+    dist = ({src: 0}, {target: 0})          # tentative distances per direction
+    parent = ({src: None}, {target: None})  # neighbor toward src / target
+    done = (set(), set())                   # settled vertices per direction
+    pq = ([(0, 0, src)], [(0, 0, target)])  # (key, tie-breaker, vertex)
+    counter = 1
+    best, meet = float('inf'), None         # length of the best path found
+    while pq[0] and pq[1]:
+        # stop once no undiscovered path can beat the best one found so far
+        if pq[0][0][0] + pq[1][0][0] >= best:
+            break
+        side = 0 if pq[0][0][0] <= pq[1][0][0] else 1   # expand the cheaper side
+        key, _, u = heapq.heappop(pq[side])
+        if u in done[side]:                 # stale entry
+            continue
+        done[side].add(u)
+        mine, other = dist[side], dist[1 - side]
+        for v, w in adjacency[side](u):
+            alt = key + w
+            if v not in mine or alt < mine[v]:
+                mine[v] = alt
+                parent[side][v] = u
+                heapq.heappush(pq[side], (alt, counter, v))
+                counter += 1
+            if v in other and mine[v] + other[v] < best:
+                best, meet = mine[v] + other[v], v
+    if meet is None:
+        return float('inf'), []
+    path = []
+    walk = meet
+    while walk is not None:                 # walk back toward src
+        path.append(walk)
+        walk = parent[0][walk]
+    path.reverse()
+    walk = parent[1][meet]
+    while walk is not None:                 # then forward toward target
+        path.append(walk)
+        walk = parent[1][walk]
+    return best, path
+
+
+
+def a_star(g, src, target, heuristic=None):
+    """ Compute a shortest path from src to target with the A* algorithm.
+    heuristic(v) must return a lower bound on the distance from v to target that
+    is consistent (h(u) <= w(u, v) + h(v)); vertices are settled in order of
+    distance plus heuristic, so a good bound steers the search toward target.
+    Without a heuristic this is Dijkstra with an early exit.
+    Return (distance, path) as bidirectional_dijkstra does. """
+    adjacency = _weighted_adjacency(g)
+    h = heuristic if heuristic is not None else (lambda v: 0)
+    dist = {src: 0}
+    parent = {src: None}
+    done = set()
+    pq = [(h(src), 0, src)]                 # (estimate, tie-breaker, vertex)
+    counter = 1
+    while pq:
+        _, _, u = heapq.heappop(pq)
+        if u in done:                       # stale entry
+            continue
+        if u == target:
+            path = []
+            while u is not None:
+                path.append(u)
+                u = parent[u]
+            path.reverse()
+            return dist[target], path
+        done.add(u)
+        for v, w in adjacency(u):
+            alt = dist[u] + w
+            if v not in done and alt < dist.get(v, float('inf')):
+                dist[v] = alt
+                parent[v] = u
+                heapq.heappush(pq, (alt + h(v), counter, v))
+                counter += 1
+    return float('inf'), []
+
+
+class Landmarks:
+    """ ALT preprocessing (A*, landmarks and triangle inequality) for repeated
+    point-to-point queries on a fixed weighted graph.
+
+    For a few landmark vertices L the distances d(L, v) and d(v, L) are stored
+    in one array('d') per landmark and direction. By the triangle inequality,
+    d(v, t) >= d(L, t) - d(L, v) and d(v, t) >= d(v, L) - d(t, L), which gives
+    a consistent A* heuristic. Landmarks are picked greedily, each as far as
+    possible from those already chosen. """
+
+    def __init__(self, g, count=8):
+        """ Choose up to count landmarks of g and compute their distance arrays. """
+        self._graph = g
+        self._vertices = list(g.vertices())
+        self._index = {v: i for i, v in enumerate(self._vertices)}
+        self._landmarks = []
+        self._from = []                     # per landmark: d(L, v) by position
+        self._to = []                       # per landmark: d(v, L) by position
+        if not self._vertices:
+            return
+        inf = float('inf')
+        # the vertex farthest from an arbitrary start makes a good first landmark
+        closest = self._distance_array(self._vertices[0], True)
+        while len(self._landmarks) < min(count, len(self._vertices)):
+            best = max(range(len(closest)), key=lambda i: closest[i] if closest[i] < inf else -1)
+            if self._vertices[best] in self._landmarks:
+                break                       # no vertex lies away from the landmarks
+            landmark = self._vertices[best]
+            self._landmarks.append(landmark)
+            self._from.append(self._distance_array(landmark, True))
+            self._to.append(self._distance_array(landmark, False)
+                            if g.is_directed() else self._from[-1])
+            if len(self._landmarks) == 1:
+                closest = array('d', self._from[0])
+            else:
+                for i, d in enumerate(self._from[-1]):
+                    if d < closest[i]:
+                        closest[i] = d
+
+    def _distance_array(self, src, outgoing):
+        """ Return array('d') of shortest distances from src (or to src, if not
+        outgoing), indexed by vertex position; infinity where unreachable. """
+        adjacency = _weighted_adjacency(self._graph, outgoing)
+        dist = array('d', [float('inf')]) * len(self._vertices)
+        index = self._index
+        done = set()
+        pq = [(0, 0, src)]
+        counter = 1
+        dist[index[src]] = 0
+        while pq:
+            key, _, u = heapq.heappop(pq)
+            if u in done:
+                continue
+            done.add(u)
+            for v, w in adjacency(u):
+                if key + w < dist[index[v]]:
+                    dist[index[v]] = key + w
+                    heapq.heappush(pq, (key + w, counter, v))
+                    counter += 1
+        return dist
+
+    def landmarks(self):
+        """ Return the list of chosen landmark vertices. """
+        return list(self._landmarks)
+
+    def heuristic(self, target):
+        """ Return a function giving a lower bound on the distance from v to target. """
+        index = self._index
+        t = index[target]
+        inf = float('inf')
+        bounds = [(dl, dl[t], dt, dt[t]) for dl, dt in zip(self._from, self._to)]
+
+        def h(v):
+            i = index[v]
+            best = 0
+            for dl, dlt, dt, dtt in bounds:
+                # a bound is only usable when both of its distances are finite
+                if dlt < inf and dl[i] < inf and dlt - dl[i] > best:
+                    best = dlt - dl[i]
+                if dt[i] < inf and dtt < inf and dt[i] - dtt > best:
+                    best = dt[i] - dtt
+            return best
+        return h
+
+    def query(self, src, target):
+        """ Return (distance, path) from src to target using A* with landmark bounds. """
+        return a_star(self._graph, src, target, self.heuristic(target))
+
+class ShortestPathTree:
+    """ Shortest-path tree from a source of a weighted Graph, kept up to date as
+    the graph changes. The tree registers itself as an observer of the graph
+    and, after each edge insertion, removal or replace_edge, repairs only the
+    vertices whose distance can change instead of re-running Dijkstra. """
+
+    def __init__(self, g, src):
+        """ Compute the tree with dijkstra and start following changes of g. """
+        self._graph = g
+        self._src = src
+        self._dist, self._pred = dijkstra(g, src)
+        g.add_observer(self._changed)
+
+    def detach(self):
+        """ Stop following changes of the graph. """
+        self._graph.remove_observer(self._changed)
+
+    def distance(self, v):
+        """ Return the distance from the source to v (infinity if unreachable). """
+        return self._dist.get(v, float('inf'))
+
+    def distances(self):
+        """ Return a dict mapping each reachable vertex to its distance. """
+        return dict(self._dist)
+
+    def path(self, v):
+        """ Return the list of vertices on a shortest path from the source to v. """
+        return construct_path(self._src, v, self._pred)
+
+    def _changed(self, kind, e, old):
+        if kind == 'insert' or (kind == 'replace' and e._element < old):
+            self._improve(e)
+        elif self._is_tree_edge(e):         # only tree edges can lengthen paths
+            self._invalidate(e)
+
+    def _is_tree_edge(self, e):
+        u, v = e.endpoints()
+        return self._pred.get(v) is e or (not self._graph.is_directed() and self._pred.get(u) is e)
+
+    def _improve(self, e):
+        """ Propagate the shortcut offered by (possibly cheaper) edge e. """
+        pq = []
+        u, v = e.endpoints()
+        ends = [(u, v)] if self._graph.is_directed() else [(u, v), (v, u)]
+        for a, b in ends:
+            if a in self._dist and self._dist[a] + e._element < self.distance(b):
+                self._dist[b] = self._dist[a] + e._element
+                self._pred[b] = e
+                heapq.heappush(pq, (self._dist[b], id(b), b))
+        self._settle(pq)
+
+    def _invalidate(self, e):
+        """ Recompute the subtree hanging below tree edge e, which was removed
+        or became more expensive. """
+        g, dist, pred = self._graph, self._dist, self._pred
+        u, v = e.endpoints()
+        root = v if pred.get(v) is e else u
+        # gather the subtree of root: vertices whose tree edge comes from it
+        affected = {root}
+        level = [root]
+        while level:
+            next_level = []
+            for x in level:
+                for y, link in g._outgoing[x].items():
+                    if y not in affected and pred.get(y) is link:
+                        affected.add(y)
+                        next_level.append(y)
+            level = next_level
+        for x in affected:
+            del dist[x]
+            del pred[x]
+        # seed each affected vertex with its best edge from the intact region
+        pq = []
+        for y in affected:
+            for x, link in g._incoming[y].items():
+                if x in dist and dist[x] + link._element < self.distance(y):
+                    dist[y] = dist[x] + link._element
+                    pred[y] = link
+            if y in dist:
+                heapq.heappush(pq, (dist[y], id(y), y))
+        self._settle(pq)
+
+    def _settle(self, pq):
+        """ Run lazy-deletion Dijkstra from the entries of pq, relaxing only
+        vertices whose distance actually improves. """
+        outgoing, dist, pred = self._graph._outgoing, self._dist, self._pred
+        while pq:
+            key, _, u = heapq.heappop(pq)
+            if key > dist.get(u, float('inf')):     # stale entry
+                continue
+            for v, e in outgoing[u].items():
+                alt = key + e._element
+                if alt < dist.get(v, float('inf')):
+                    dist[v] = alt
+                    pred[v] = e
+                    heapq.heappush(pq, (alt, id(v), v))
+
+
+class MinimumSpanningTree:
+    """ Minimum spanning forest of an undirected weighted Graph, kept up to date
+    as the graph changes. An inserted or cheapened edge replaces the heaviest
+    edge on the tree path between its endpoints; a removed or more expensive
+    tree edge is replaced by the cheapest edge reconnecting the two halves,
+    found by scanning only the smaller half. """
+
+    def __init__(self, g):
+        """ Compute the forest with MST_Kruskal and start following changes of g. """
+        if g.is_directed():
+            raise ValueError('minimum spanning tree needs an undirected graph')
+        self._graph = g
+        self._adj = {}                      # tree adjacency: v -> {w: edge}
+        for e in MST_Kruskal(g):
+            self._link(e)
+        g.add_observer(self._changed)
+
+    def detach(self):
+        """ Stop following changes of the graph. """
+        self._graph.remove_observer(self._changed)
+
+    def edges(self):
+        """ Return a list of the edges of the spanning forest. """
+        return [e for v, links in self._adj.items() for w, e in links.items() if e._origin is v]
+
+    def weight(self):
+        """ Return the total weight of the spanning forest. """
+        return sum(e._element for e in self.edges())
+
+    def _link(self, e):
+        u, v = e.endpoints()
+        self._adj.setdefault(u, {})[v] = e
+        self._adj.setdefault(v, {})[u] = e
+
+    def _unlink(self, e):
+        u, v = e.endpoints()
+        del self._adj[u][v]
+        del self._adj[v][u]
+
+    def _in_tree(self, e):
+        u, v = e.endpoints()
+        return self._adj.get(u, {}).get(v) is e
+
+    def _changed(self, kind, e, old):
+        if kind == 'insert':
+            self._offer(e)
+        elif kind == 'remove':
+            if self._in_tree(e):
+                self._unlink(e)
+                self._reconnect(e)
+        elif self._in_tree(e):
+            if e._element > old:            # tree edge got heavier
+                self._unlink(e)
+                self._reconnect(e)
+        elif e._element < old:              # non-tree edge got lighter
+            self._offer(e)
+
+    def _tree_path(self, u, v):
+        """ Return the tree edges on the path from u to v, or None if disconnected. """
+        via = {u: None}
+        level = [u]
+        while level and v not in via:
+            next_level = []
+            for x in level:
+                for y, e in self._adj.get(x, {}).items():
+                    if y not in via:
+                        via[y] = e
+                        next_level.append(y)
+            level = next_level
+        if v not in via:
+            return None
+        path = []
+        while v is not u:
+            path.append(via[v])
+            v = via[v].opposite(v)
+        return path
+
+    def _offer(self, e):
+        """ Add e to the forest if it joins two trees or beats the heaviest
+        edge of the cycle it would close. """
+        u, v = e.endpoints()
+        path = self._tree_path(u, v)
+        if path is None:
+            self._link(e)
+        elif path:
+            heaviest = max(path, key=lambda f: f._element)
+            if e._element < heaviest._element:
+                self._unlink(heaviest)
+                self._link(e)
+
+    def _side(self, v, limit):
+        """ Return the vertices of the tree containing v, or None once more than
+        limit vertices have been found. """
+        side = {v}
+        level = [v]
+        while level:
+            next_level = []
+            for x in level:
+                for y in self._adj.get(x, {}):
+                    if y not in side:
+                        side.add(y)
+                        if len(side) > limit:
+                            return None
+                        next_level.append(y)
+            level = next_level
+        return side
+
+    def _reconnect(self, e):
+        """ Find the cheapest graph edge joining the two trees left by cutting e. """
+        u, v = e.endpoints()
+        # grow both halves in turn so only the smaller one is fully explored
+        limit = 1
+        while True:
+            side = self._side(u, limit) or self._side(v, limit)
+            if side is not None:
+                break
+            limit *= 2
+        best = None
+        for x in side:
+            for y, link in self._graph._outgoing.get(x, {}).items():
+                if y not in side and (best is None or link._element < best._element):
+                    best = link
+        if best is not None:
+            self._link(best)
+
 def MST_PrimJarnik(g):
     """ Compute a minimum spanning tree of weighted graph g.
     Return a list of edges that comprise the MST (in arbitrary order). """
+    if isinstance(g, CSRGraph):
+        return _MST_PrimJarnik_csr(g)
 
     d = {}                                  # d[v] is bound on distance to tree
     tree = []                               # list of edges in spanning tree
@@ -364,31 +1745,143 @@ def MST_PrimJarnik(g):
     return tree
 
 
+def _MST_PrimJarnik_csr(g):
+    """ Prim-Jarnik on a CSRGraph, keyed by (weight, slot) heap entries. """
+    g._require_weights()
+    offsets, targets, weights = g._offsets, g._targets, g._weights
+    n = g.vertex_count()
+    tree = []
+    if n == 0:
+        return tree
+    in_tree = bytearray(n)                  # 1 once a vertex joins the tree
+    d = [float('inf')] * n
+    for root in range(n):                   # one tree per connected component
+        if in_tree[root]:
+            continue
+        pq = [(0, root, -1, -1)]            # (d[v], v, u, slot of edge (u, v))
+        while pq:
+            key, v, u, j = heapq.heappop(pq)
+            if in_tree[v]:                  # stale entry
+                continue
+            in_tree[v] = 1
+            if j >= 0:
+                tree.append(g._edge(u, j))
+            for k in range(offsets[v], offsets[v + 1]):
+                w = targets[k]
+                if not in_tree[w] and weights[k] < d[w]:
+                    d[w] = weights[k]
+                    heapq.heappush(pq, (d[w], w, v, k))
+    return tree
+
+
 def MST_Kruskal(g):
     """ Compute the minimum spanning tree of a graph using Kruskal's algorithm.
     Return a list of edge that comprise the MST.
     The element of the graph's edges are assumed to be weighted """
+    if isinstance(g, CSRGraph):
+        return _MST_Kruskal_csr(g)
 
+    # sort the edges once by weight instead of pushing each through a heap
+    edges = sorted(g.edges(), key=lambda e: e._element)
+    index = {v: i for i, v in enumerate(g.vertices())}
+    forest = ArrayPartition(len(index))     # keep track of forest clusters
     tree = []                               # list of edges in spanning tree
-    pq = HeapPriorityQueue()                # entries aer edges in g, with weighted as key
-    forest = Partition()                    # keep track of forest clusters
-    position = {}                           # map each node to its Partition entry
-
-    for v in g.vertices():
-        position[v] = forest.make_group(v)
-
-    for e in g.edges():
-        pq.add(e.element(), e)  # edge's element is assumed to be its weighted
 
     size = g.vertex_count()
-    while len(tree) != size - 1 and not pq.is_empty():
-        # tree not spanning and unprocessed edges remain
-        weight, edge = pq.remove_min()
+    for edge in edges:
+        if len(tree) == size - 1:           # tree is spanning: stop early
+            break
         u, v = edge.endpoints()
-        a = forest.find(position[u])
-        b = forest.find(position[v])
-        if a != b:
+        if forest.union(index[u], index[v]):
             tree.append(edge)
-            forest.union(a, b)
 
-    return tree
\ No newline at end of file
+    return tree
+
+
+def _MST_Kruskal_csr(g):
+    """ Kruskal on a CSRGraph: sort the edge slots once by weight. """
+    g._require_weights()
+    offsets, targets, weights = g._offsets, g._targets, g._weights
+    slots = []                              # (weight, u, slot), one per edge
+    for u in range(g.vertex_count()):
+        for j in range(offsets[u], offsets[u + 1]):
+            if g._directed or u < targets[j]:   # undirected: keep one copy
+                slots.append((weights[j], u, j))
+    slots.sort()
+
+    tree = []
+    forest = ArrayPartition(g.vertex_count())
+    size = g.vertex_count()
+    for weight, u, j in slots:
+        if len(tree) == size - 1:
+            break
+        if forest.union(u, targets[j]):
+            tree.append(g._edge(u, j))
+    return tree
+
+
+def _cheapest_edges(g, comp, lo, hi):
+    """ For vertices lo..hi-1 of CSRGraph g, return a dict mapping each component
+    id to (key, u, slot) for the cheapest edge leaving that component. Keys are
+    (weight, smaller endpoint, larger endpoint), a total order on edges that
+    keeps Boruvka from closing a cycle between equal weights. """
+    offsets, targets, weights = g._offsets, g._targets, g._weights
+    best = {}
+    for u in range(lo, hi):
+        c = comp[u]
+        for j in range(offsets[u], offsets[u + 1]):
+            v = targets[j]
+            if comp[v] != c:
+                key = (weights[j], u, v) if u < v else (weights[j], v, u)
+                current = best.get(c)
+                if current is None or key < current[0]:
+                    best[c] = (key, u, j)
+    return best
+
+
+def _cheapest_edges_shared(task):
+    lo, hi, comp = task
+    return _cheapest_edges(_shared_snapshot, comp, lo, hi)
+
+
+def MST_Boruvka(g, processes=1):
+    """ Compute a minimum spanning forest of an undirected weighted CSRGraph using
+    Boruvka's algorithm. Each round picks the cheapest edge leaving every
+    component and merges along all of them, so there are at most log2(n) rounds.
+    With processes > 1 the scan of each round is split into vertex ranges that
+    run in a multiprocessing pool over a shared memory-mapped copy of g.
+    Return a list of edges that comprise the forest. """
+    g._require_weights()
+    n = g.vertex_count()
+    forest = ArrayPartition(n)
+    tree = []
+    pool = folder = None
+    if processes > 1:
+        folder = tempfile.TemporaryDirectory()
+        path = os.path.join(folder.name, 'snapshot.csr')
+        g.save(path)
+        pool = Pool(processes, initializer=_open_shared_snapshot, initargs=(path,))
+    try:
+        while True:
+            comp = array('i', (forest.find(v) for v in range(n)))
+            if pool is None:
+                shards = [_cheapest_edges(g, comp, 0, n)]
+            else:
+                step = max(1, -(-n // processes))   # ceiling division; n may be 0
+                tasks = [(lo, min(lo + step, n), comp) for lo in range(0, n, step)]
+                shards = pool.map(_cheapest_edges_shared, tasks)
+            best = {}
+            for shard in shards:
+                for c, candidate in shard.items():
+                    if c not in best or candidate[0] < best[c][0]:
+                        best[c] = candidate
+            if not best:                    # no edge leaves any component
+                return tree
+            for key, u, j in best.values():
+                if forest.union(u, g._targets[j]):  # two components may pick one edge
+                    tree.append(g._edge(u, j))
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+            folder.cleanup()
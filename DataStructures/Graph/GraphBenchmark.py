@@ -0,0 +1,204 @@
+""" Benchmark suite for the graph module.
+
+Builds deterministic synthetic graphs, times the main algorithms of Graph.py on
+them and reports throughput and peak memory. Results can be stored as a JSON
+baseline and later runs compared against it, so regressions are detectable.
+
+Run from the repository root (the priority queue modules import each other
+by plain module name, so their folder must be on the path as well):
+
+    PYTHONPATH=DataStructures/Graph python -m DataStructures.Graph.GraphBenchmark --scale 100k
+    ... --save baseline.json            # record a baseline
+    ... --baseline baseline.json        # compare against it (exit code 1 on regression)
+"""
+
+import argparse
+import json
+import random
+import sys
+import timeit
+import tracemalloc
+
+from .Graph import (Graph, BFS, DFS, dijkstra, MST_PrimJarnik, MST_Kruskal,
+                    transitive_closure, topological_layers)
+
+
+SCALES = {'1k': 1000, '10k': 10000, '100k': 100000, '1M': 1000000, '10M': 10000000}
+CLOSURE_LIMIT = 20000                       # closure rows grow as vertices^2 bits
+
+
+# deterministic generators: each yields (a, b, weight) tuples for Graph.from_edges
+def erdos_renyi(n, m, seed=0):
+    """ Generate m distinct random edges among n vertices (G(n, m) model). """
+    rnd = random.Random(seed)
+    seen = set()
+    while len(seen) < m:
+        a, b = rnd.randrange(n), rnd.randrange(n)
+        if a != b and (a, b) not in seen and (b, a) not in seen:
+            seen.add((a, b))
+            yield a, b, rnd.randint(1, 100)
+
+
+def grid(side, seed=0):
+    """ Generate the edges of a side x side grid with random weights. """
+    rnd = random.Random(seed)
+    for i in range(side):
+        for j in range(side):
+            if i + 1 < side:
+                yield i * side + j, (i + 1) * side + j, rnd.randint(1, 100)
+            if j + 1 < side:
+                yield i * side + j, i * side + j + 1, rnd.randint(1, 100)
+
+
+def power_law(n, k, seed=0):
+    """ Generate a preferential-attachment graph: each new vertex links to k
+    distinct earlier vertices chosen with probability proportional to degree. """
+    rnd = random.Random(seed)
+    ends = list(range(k))                   # every vertex once per incident edge
+    for v in range(k, n):
+        chosen = set()
+        while len(chosen) < k:
+            chosen.add(rnd.choice(ends))
+        for u in chosen:
+            yield v, u, rnd.randint(1, 100)
+        ends.extend(chosen)
+        ends.extend([v] * k)
+
+
+def random_dag(n, m, seed=0):
+    """ Generate m distinct edges (a, b) with a < b, so the graph is acyclic. """
+    rnd = random.Random(seed)
+    seen = set()
+    while len(seen) < m:
+        a, b = rnd.randrange(n), rnd.randrange(n)
+        if a < b and (a, b) not in seen:
+            seen.add((a, b))
+            yield a, b, rnd.randint(1, 100)
+
+
+def workloads(edges):
+    """ Return (name, directed, edge generator) for each graph family, sized to
+    hold about the given number of edges. """
+    n = max(edges // 4, 2)
+    side = max(int((edges / 2) ** 0.5), 2)
+    return [
+        ('erdos_renyi', False, lambda: erdos_renyi(n, edges)),
+        ('grid', False, lambda: grid(side)),
+        ('power_law', False, lambda: power_law(n, 4)),
+        ('dag', True, lambda: random_dag(n, edges)),
+    ]
+
+
+def steps(name, directed, g, vertices):
+    """ Return (step name, function) pairs to time on graph g. """
+    src = vertices[0]
+    result = [
+        ('BFS', lambda: BFS(g, src, {src: None})),
+        ('DFS', lambda: DFS(g, src, {src: None})),
+        ('dijkstra', lambda: dijkstra(g, src)),
+    ]
+    if not directed:
+        result += [('prim', lambda: MST_PrimJarnik(g)),
+                   ('kruskal', lambda: MST_Kruskal(g))]
+    if g.vertex_count() <= CLOSURE_LIMIT:
+        result.append(('closure', lambda: transitive_closure(g)))
+    if directed:
+        result.append(('topological_sort', lambda: topological_layers(g)))
+    return result
+
+
+def measure(fn, memory, repeat=5):
+    """ Run fn and return (seconds per call, peak bytes or None). The time is the
+    best of repeat samples, each timing enough calls to last at least 0.2 s, so
+    short steps are not dominated by timer and scheduling noise. Peak memory is
+    taken in a separate run under tracemalloc, so it does not distort the timing. """
+    timer = timeit.Timer(fn)
+    number = timer.autorange()[0]
+    seconds = min(timer.repeat(repeat, number)) / number
+    peak = None
+    if memory:
+        tracemalloc.start()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return seconds, peak
+
+
+def run(scale, memory=True, repeat=5):
+    """ Run every workload at the given scale and return the results as a dict. """
+    edges = SCALES[scale]
+    results = {}
+    for name, directed, generate in workloads(edges):
+        edge_list = list(generate())        # generate outside the timing
+        built = {}
+
+        def construct():
+            built['graph'] = Graph.from_edges(edge_list, directed)
+        row = {}
+        seconds, peak = measure(construct, memory, repeat)
+        g, vertices = built['graph']
+        m = g.edge_count()
+        row['construct'] = {'seconds': seconds, 'edges_per_second': m / seconds, 'peak_bytes': peak}
+        ordered = sorted(vertices.values(), key=lambda v: v.element())
+        for step, fn in steps(name, directed, g, ordered):
+            seconds, peak = measure(fn, memory, repeat)
+            row[step] = {'seconds': seconds, 'edges_per_second': m / seconds, 'peak_bytes': peak}
+        results[name] = {'vertices': g.vertex_count(), 'edges': m, 'steps': row}
+    return {'scale': scale, 'python': sys.version.split()[0], 'results': results}
+
+
+def compare(current, baseline, tolerance):
+    """ Return a list of (workload, step, ratio) for steps slower than baseline
+    by more than the given fraction. """
+    regressions = []
+    for name, data in current['results'].items():
+        old = baseline.get('results', {}).get(name, {}).get('steps', {})
+        for step, row in data['steps'].items():
+            if step in old and old[step]['seconds'] > 0:
+                ratio = row['seconds'] / old[step]['seconds']
+                if ratio > 1 + tolerance:
+                    regressions.append((name, step, ratio))
+    return regressions
+
+
+def report(results):
+    print('scale %s (Python %s)' % (results['scale'], results['python']))
+    for name, data in results['results'].items():
+        print('%s: %d vertices, %d edges' % (name, data['vertices'], data['edges']))
+        for step, row in data['steps'].items():
+            peak = '' if row['peak_bytes'] is None else '%10.1f MiB' % (row['peak_bytes'] / 2 ** 20)
+            print('    {0:<18}{1:>10.4f} s{2:>14.0f} edges/s{3}'.format(
+                step, row['seconds'], row['edges_per_second'], peak))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the graph module.')
+    parser.add_argument('--scale', choices=SCALES, default='10k')
+    parser.add_argument('--no-memory', action='store_true', help='skip peak memory runs')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='timing samples per step; the fastest one is kept')
+    parser.add_argument('--save', help='write results to this JSON file')
+    parser.add_argument('--baseline', help='compare against this JSON file')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed slowdown before a step counts as a regression')
+    args = parser.parse_args(argv)
+
+    results = run(args.scale, memory=not args.no_memory, repeat=args.repeat)
+    report(results)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('scale') != args.scale:
+            parser.error('baseline was recorded at scale %s' % baseline.get('scale'))
+        regressions = compare(results, baseline, args.tolerance)
+        for name, step, ratio in regressions:
+            print('REGRESSION %s/%s: %.2fx slower than baseline' % (name, step, ratio))
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,6 +4,8 @@ from UnsortedMap import UnsortedTableMap
 class ChainHashMap(HashMapBase):
     """ Hash map implemented with separate chaining for collision resolution """
 
+    _MAX_LOAD = 0.9                                         # chains stay short up to about 0.9
+
     def _bucket_getitem(self, j, k):
         bucket = self._table[j]
         if bucket is None:                                  # no match found
@@ -24,9 +26,20 @@ class ChainHashMap(HashMapBase):
             raise KeyError('Key Error: ' + repr(k))
         del bucket[k]
 
+    def _bucket_drain(self, j):
+        """ Empty bucket j and return its (key, value) pairs """
+        bucket = self._table[j]
+        if bucket is None:
+            return ()
+        self._table[j] = None
+        return bucket.items()
+
     def __iter__(self):
         for bucket in self._table:
             if bucket is not None:                          # a nonempty slot
                 for key in bucket:
                     yield key
+        if self._old is not None:                           # keys not migrated yet
+            for key in self._old:
+                yield key
 
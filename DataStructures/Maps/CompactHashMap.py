@@ -0,0 +1,151 @@
+from array import array
+from MapBase import MapBase
+
+class CompactHashMap(MapBase):
+    """ Hash map keeping keys, values and cached hashes in parallel arrays
+
+    Entries are stored densely in three parallel arrays, and a separate index
+    array of power-of-two size maps table slots (found by linear probing with a
+    mask) to positions in them. No per-entry item objects are created, each
+    key is hashed exactly once, and a resize only rebuilds the index from the
+    cached hashes.
+    """
+
+    _GOLDEN = 0x9E3779B97F4A7C15                # 2^64 / golden ratio, spreads hash bits
+    _MAX_LOAD = 2 / 3                           # grow the index beyond this load factor
+
+    def __init__(self, cap=8):
+        """ Create an empty map with room for about 2/3 cap entries """
+        self._floor = self._index_size(cap)     # never shrink below the initial size
+        self._keys = []
+        self._values = []
+        self._hashes = array('Q')               # mixed hash of each entry
+        self._build_index(self._floor)
+
+    @staticmethod
+    def _index_size(cap):
+        """ Return the smallest power of two that is at least cap (and at least 8) """
+        size = 8
+        while size < cap:
+            size *= 2
+        return size
+
+    def _mix(self, k):
+        """ Return hash(k) scrambled so its low bits make a good table slot """
+        x = (hash(k) * self._GOLDEN) & 0xFFFFFFFFFFFFFFFF
+        return x ^ (x >> 32)
+
+    def _build_index(self, size):
+        """ Rebuild the index with the given power-of-two size from cached hashes """
+        index = array('q', [-1]) * size         # position of each slot's entry, -1 if empty
+        mask = size - 1
+        for p, h in enumerate(self._hashes):
+            j = h & mask
+            while index[j] >= 0:
+                j = (j + 1) & mask
+            index[j] = p
+        self._index = index
+        self._mask = mask
+
+    def _lookup(self, k, h):
+        """ Return (slot, position) for key k with mixed hash h.
+            If k is absent, position is -1 and slot is where it would go.
+        """
+        index, hashes, keys, mask = self._index, self._hashes, self._keys, self._mask
+        j = h & mask
+        while True:
+            p = index[j]
+            if p < 0:
+                return j, -1                    # reached an empty slot
+            if hashes[p] == h and (keys[p] is k or keys[p] == k):
+                return j, p                     # found a match
+            j = (j + 1) & mask                  # keep looking (cyclically)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __getitem__(self, k):
+        p = self._lookup(k, self._mix(k))[1]
+        if p < 0:
+            raise KeyError('Key Error: ' + repr(k))
+        return self._values[p]
+
+    def __setitem__(self, k, v):
+        h = self._mix(k)
+        j, p = self._lookup(k, h)
+        if p >= 0:
+            self._values[p] = v                 # overwrite existing
+            return
+        self._index[j] = len(self._keys)
+        self._keys.append(k)
+        self._values.append(v)
+        self._hashes.append(h)
+        if len(self._keys) > len(self._index) * self._MAX_LOAD:
+            self._build_index(2 * len(self._index))
+
+    def __delitem__(self, k):
+        j, p = self._lookup(k, self._mix(k))
+        if p < 0:
+            raise KeyError('Key Error: ' + repr(k))
+        self._vacate(j)
+        last = len(self._keys) - 1
+        if p != last:                           # move the last entry into the hole
+            s = self._hashes[last] & self._mask
+            while self._index[s] != last:
+                s = (s + 1) & self._mask
+            self._index[s] = p
+            self._keys[p] = self._keys[last]
+            self._values[p] = self._values[last]
+            self._hashes[p] = self._hashes[last]
+        self._keys.pop()
+        self._values.pop()
+        self._hashes.pop()
+        # shrink at a quarter of the maximum load, leaving the index half full
+        if len(self._index) > self._floor and len(self._keys) < len(self._index) * self._MAX_LOAD / 4:
+            self._build_index(len(self._index) // 2)
+
+    def reserve(self, n):
+        """ Make room for n entries in total without any further resize """
+        size = self._index_size(int(n / self._MAX_LOAD) + 1)
+        if size > len(self._index):
+            self._build_index(size)
+
+    def bulk_update(self, pairs):
+        """ Insert (k, v) pairs, or the items of a map, sizing the index once
+        instead of checking the load factor after every insertion """
+        if hasattr(pairs, 'keys'):
+            pairs = pairs.items()
+        if not hasattr(pairs, '__len__'):
+            pairs = list(pairs)
+        self.reserve(len(self) + len(pairs))
+        index, keys, values, hashes = self._index, self._keys, self._values, self._hashes
+        for (k, v) in pairs:
+            h = self._mix(k)
+            j, p = self._lookup(k, h)
+            if p >= 0:
+                values[p] = v
+            else:
+                index[j] = len(keys)
+                keys.append(k)
+                values.append(v)
+                hashes.append(h)
+
+    def _vacate(self, j):
+        """ Empty index slot j, moving later entries of its cluster back so that
+            every entry stays reachable from its home slot without markers """
+        index, hashes, mask = self._index, self._hashes, self._mask
+        i = j
+        while True:
+            i = (i + 1) & mask
+            p = index[i]
+            if p < 0:
+                break
+            # the entry at i may fill j only if j lies between its home and i
+            if (i - (hashes[p] & mask)) & mask >= (i - j) & mask:
+                index[j] = p
+                j = i
+        index[j] = -1
+
+    def __iter__(self):
+        for k in self._keys:
+            yield k
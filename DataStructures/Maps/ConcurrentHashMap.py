@@ -0,0 +1,171 @@
+import threading
+import weakref
+from collections.abc import Mapping
+from HashMapBase import HashMapBase
+from ChainHashMap import ChainHashMap
+
+class ConcurrentHashMap(HashMapBase):
+    """ Thread-safe hash map made of independently locked segments
+
+    The bucket array holds a fixed number of segments, each a complete hash map
+    guarded by its own lock, so threads using keys of different segments never
+    wait for each other. snapshot() returns an immutable view of the whole map
+    whose reads take no locks at all.
+    """
+
+    class _Segment:
+        """ One independently locked part of the map """
+        __slots__ = '_lock', '_map', '_version'
+
+        def __init__(self, m):
+            self._lock = threading.RLock()
+            self._map = m
+            self._version = 0                   # increased by every change
+
+    class _Snapshot(Mapping):
+        """ Immutable point-in-time view of a ConcurrentHashMap """
+
+        def __init__(self, hash_function, parts, versions):
+            self._hash_function = hash_function     # same segment layout as the map
+            self._parts = parts                     # one dict per segment
+            self._versions = versions               # segment versions the parts were copied at
+
+        def __getitem__(self, k):
+            part = self._parts[self._hash_function(k)]
+            if k not in part:
+                raise KeyError('Key Error: ' + repr(k))
+            return part[k]
+
+        def __len__(self):
+            return sum(len(part) for part in self._parts)
+
+        def __iter__(self):
+            for part in self._parts:
+                for k in part:
+                    yield k
+
+    def __init__(self, segments=16, factory=ChainHashMap):
+        """ Create an empty map with the given number of segments, each a new factory() map """
+        super().__init__(cap=segments)
+        self._factory = factory
+        for j in range(segments):
+            self._table[j] = self._Segment(factory())
+        self._last = None                       # weak reference to the latest snapshot
+
+    def _bucket_getitem(self, j, k):
+        segment = self._table[j]
+        with segment._lock:
+            return segment._map[k]              # may raise KeyError
+
+    def _bucket_setitem(self, j, k, v):
+        segment = self._table[j]
+        with segment._lock:
+            segment._map[k] = v
+            segment._version += 1
+
+    def _bucket_delitem(self, j, k):
+        segment = self._table[j]
+        with segment._lock:
+            del segment._map[k]                 # may raise KeyError
+            segment._version += 1
+
+    def __setitem__(self, k, v):
+        self._bucket_setitem(self._hash_function(k), k, v)      # segments resize themselves
+
+    def __delitem__(self, k):
+        self._bucket_delitem(self._hash_function(k), k)
+
+    def __len__(self):
+        return sum(len(segment._map) for segment in self._table)
+
+    def _resize(self, c):
+        """ The segment table has a fixed size; segments resize themselves """
+        raise RuntimeError('the segment table of a ConcurrentHashMap cannot be resized')
+
+    def reserve(self, n):
+        """ Make room for n entries in total, spread evenly over the segments """
+        share = -(-n // len(self._table))           # ceiling of n / segments
+        for segment in self._table:
+            with segment._lock:
+                segment._map.reserve(share)
+
+    def bulk_update(self, pairs):
+        """ Insert (k, v) pairs, or the items of a map, taking each segment's lock
+        once for all of its pairs """
+        if hasattr(pairs, 'keys'):
+            pairs = pairs.items()
+        groups = {}
+        for (k, v) in pairs:
+            groups.setdefault(self._hash_function(k), []).append((k, v))
+        for j, group in groups.items():
+            segment = self._table[j]
+            with segment._lock:
+                segment._map.bulk_update(group)
+                segment._version += 1
+
+    def get_or_compute(self, k, fn):
+        """ Return the value for k, first storing fn(k) if k is absent.
+            The check and the insertion happen under the segment's lock, so fn
+            is called at most once per missing key even when threads race.
+            Because that lock is held while fn runs, fn must not touch keys of
+            other segments: two threads doing so in opposite directions deadlock. """
+        segment = self._table[self._hash_function(k)]
+        with segment._lock:
+            try:
+                return segment._map[k]
+            except KeyError:
+                v = fn(k)
+                segment._map[k] = v
+                segment._version += 1
+                return v
+
+    def snapshot(self):
+        """ Return an immutable view of the map at this moment. All segment locks
+            are held while it is taken (always in the same order, so snapshots
+            cannot deadlock). While the previous snapshot is still in use, its
+            copies of unchanged segments are shared instead of copied again;
+            the map itself keeps no copies. """
+        segments = self._table
+        for segment in segments:
+            segment._lock.acquire()
+        try:
+            previous = self._last() if self._last is not None else None
+            parts = []
+            versions = []
+            for j, segment in enumerate(segments):
+                if previous is not None and previous._versions[j] == segment._version:
+                    parts.append(previous._parts[j])
+                else:
+                    parts.append(dict(segment._map.items()))
+                versions.append(segment._version)
+            view = self._Snapshot(self._hash_function, parts, versions)
+            self._last = weakref.ref(view)
+        finally:
+            for segment in segments:
+                segment._lock.release()
+        return view
+
+    def __iter__(self):
+        for segment in self._table:
+            with segment._lock:                 # keys of one segment at a time
+                keys = list(segment._map)
+            for k in keys:
+                yield k
+
+    def popitem(self):
+        """ Remove and return some (key, value) pair; raise KeyError if empty """
+        for segment in self._table:
+            with segment._lock:
+                for k in segment._map:
+                    v = segment._map[k]
+                    del segment._map[k]
+                    segment._version += 1
+                    return k, v
+        raise KeyError('popitem(): map is empty')
+
+    def clear(self):
+        """ Remove all items, replacing each segment's map with an empty one """
+        for segment in self._table:
+            with segment._lock:
+                segment._map = self._factory()
+                segment._version += 1
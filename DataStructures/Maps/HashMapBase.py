@@ -4,41 +4,128 @@ from MapBase import MapBase
 class HashMapBase(MapBase):
     """ Abstract base class for map using hash-table with MAD compression """
 
-    def __init__(self, cap=11, p=109345121):
-        """ Create an empty hash-table map """
+    _MAX_LOAD = 0.5                             # grow beyond this load factor (per subclass)
+    _MIGRATE = 4                                # old buckets moved per update while rehashing
+
+    def __init__(self, cap=11, p=109345121, incremental=False):
+        """ Create an empty hash-table map
+
+        With incremental=True a resize does not rehash everything at once: the
+        old table is kept next to the new one and every later update moves a
+        few of its buckets over, so no single operation pays for the whole resize.
+        """
         self._table = cap * [None]
-        self._n = 0                             # number of entries in the map
+        self._floor = cap                       # never shrink below the initial capacity
+        self._n = 0                             # number of entries in self._table
+        self._dead = 0                          # slots holding deletion markers (open addressing)
         self._prime = p                         # prime for MAD compression
         self._scale = 1 + randrange(p - 1)      # scale from 1 to p - 1 for MAD
         self._shift = randrange(p)              # shift from 0 to p - 1 for MAD
+        self._incremental = incremental
+        self._old = None                        # map holding the previous table during a rehash
+        self._next = 0                          # next bucket of self._old to migrate
 
     def _hash_function(self, k):
         return (hash(k) * self._scale + self._shift) % self._prime % len(self._table)
 
     def __len__(self):
+        if self._old is not None:
+            return self._n + self._old._n
         return self._n
 
     def __getitem__(self, k):
         j = self._hash_function(k)
-        return self._bucket_getitem(j, k)           # may raise KeyError
+        try:
+            return self._bucket_getitem(j, k)       # may raise KeyError
+        except KeyError:
+            if self._old is None:
+                raise
+            return self._old[k]                     # not migrated yet
 
     def __setitem__(self, k, v):
-        j = self._hash_function(k)                  
+        if self._old is not None:
+            self._rehash_step()
+            if self._old is not None:
+                try:
+                    del self._old[k]                # key moves to the new table
+                except KeyError:
+                    pass
+        j = self._hash_function(k)
         self._bucket_setitem(j, k, v)           # subroutine maintains self._n
-        if self._n > len(self._table) // 2:     # keep load factor <= 0.5
-            # number 2^x - 1 is often prime
-            self._resize(2 * len(self._table) - 1)
+        # deletion markers use up slots too, so they count towards the load
+        if len(self) + self._dead > len(self._table) * self._MAX_LOAD:
+            if len(self) > len(self._table) * self._MAX_LOAD / 2:
+                # number 2^x - 1 is often prime
+                self._resize(2 * len(self._table) - 1)
+            else:
+                self._resize(len(self._table))  # mostly markers: rebuild to drop them
 
     def __delitem__(self, k):
+        if self._old is not None:
+            self._rehash_step()
         j = self._hash_function(k)
-        self._bucket_delitem(j, k)
-        self._n -= 1
+        try:
+            self._bucket_delitem(j, k)
+            self._n -= 1
+        except KeyError:
+            if self._old is None:
+                raise
+            del self._old[k]                        # old map keeps its own count
+        # shrink once the load falls to a quarter of the maximum, so the table
+        # is half full afterwards and a few inserts cannot make it grow again
+        if len(self._table) > self._floor and len(self) < len(self._table) * self._MAX_LOAD / 4:
+            self._resize(max((len(self._table) + 1) // 2, self._floor))
+
+    def reserve(self, n):
+        """ Make room for n entries in total without any further resize """
+        c = int(n / self._MAX_LOAD) + 1
+        if c > len(self._table) or n + self._dead > len(self._table) * self._MAX_LOAD:
+            self._resize(max(c, len(self._table)))
+
+    def bulk_update(self, pairs):
+        """ Insert (k, v) pairs, or the items of a map, sizing the table once
+        instead of checking the load factor after every insertion """
+        if hasattr(pairs, 'keys'):
+            pairs = pairs.items()
+        if not hasattr(pairs, '__len__'):
+            pairs = list(pairs)
+        self.reserve(len(self) + len(pairs))
+        while self._old is not None:                # all items must be in self._table
+            self._rehash_step()
+        for (k, v) in pairs:
+            self._bucket_setitem(self._hash_function(k), k, v)
+
+    def _rehash_step(self):
+        """ Move the next _MIGRATE buckets of the old table into the current one """
+        old = self._old
+        for _ in range(self._MIGRATE):
+            if self._next == len(old._table):
+                self._old = None                    # migration complete
+                return
+            for (k, v) in old._bucket_drain(self._next):
+                old._n -= 1
+                self._bucket_setitem(self._hash_function(k), k, v)
+            self._next += 1
 
     def _resize(self, c):
         """ Resize bucket array to capacity c """
+        if self._incremental:
+            while self._old is not None:            # finish any earlier migration first
+                self._rehash_step()
+            old = object.__new__(type(self))        # old map takes over the current table
+            old.__dict__.update(self.__dict__)
+            old._incremental = False
+            old._floor = len(old._table)            # deletions must not resize the old table
+            self._old = old
+            self._next = 0
+            self._table = c * [None]
+            self._n = 0
+            self._dead = 0
+            return
         old = list(self.items())    # use iteration to record existing items
         self._table = c * [None]    # then reset table to desired capacity
         self._n = 0                 # n recomputed during subsequent adds
+        self._dead = 0              # a fresh table has no deletion markers
         for (k, v) in old:
             self[k] = v             # reinsert old key-value pair
 
@@ -35,6 +35,8 @@ class ProbeHashMap(HashMapBase):
     def _bucket_setitem(self, j, k, v):
         found, s = self._find_slot(j, k)
         if not found:
+            if self._table[s] is ProbeHashMap._AVAIL:
+                self._dead -= 1                         # reusing a vacated slot
             self._table[s] = self._Item(k, v)           # insert new item
             self._n += 1                                # size has increased
         else:
@@ -45,9 +47,41 @@ class ProbeHashMap(HashMapBase):
         if not found:
             raise KeyError('Key Error: ' + repr(k))
         self._table[s] = ProbeHashMap._AVAIL            # mark as vacated
+        self._dead += 1
+
+    def _bucket_drain(self, j):
+        """ Empty slot j and return its (key, value) pairs. Slots are drained in
+        increasing order; once a whole cluster is drained its markers are reset
+        to None, so searches for keys still in the table stay short. """
+        item = self._table[j]
+        if item is None:
+            return ()
+        self._table[j] = ProbeHashMap._AVAIL
+        if self._table[(j + 1) % len(self._table)] is None:     # end of a cluster
+            i = j
+            while i >= 0 and self._table[i] is ProbeHashMap._AVAIL:
+                self._table[i] = None
+                i -= 1
+        if item is ProbeHashMap._AVAIL:
+            return ()
+        return ((item._key, item._value),)
 
     def __iter__(self):
         for j in range(len(self._table)):
             if not self._is_available(j):
                 yield self._table[j]._key
+        if self._old is not None:                       # keys not migrated yet
+            for key in self._old:
+                yield key
+
+
 
+if __name__ == '__main__':
+    # churn: a sliding window of 1000 live keys. Deletion markers count towards
+    # the load factor, so the table is rebuilt before they can fill every slot
+    m = ProbeHashMap()
+    for i in range(100000):
+        m[i] = i
+        if i >= 1000:
+            del m[i - 1000]
+    print('live keys:', len(m), 'capacity:', len(m._table), 'markers:', m._dead)
@@ -0,0 +1,112 @@
+from HashMapBase import HashMapBase
+from MapBase import MapBase
+
+class RobinHoodHashMap(HashMapBase):
+    """ Hash map implemented with Robin Hood linear probing and backward-shift deletion """
+
+    _MAX_LOAD = 0.8                                 # probe lengths stay low at high loads
+
+    class _Slot(MapBase._Item):
+        """ Item that also records its distance from its home slot """
+        __slots__ = '_dist'
+
+        def __init__(self, k, v, d):
+            super().__init__(k, v)
+            self._dist = d
+
+    def _find_slot(self, j, k):
+        """ Return index of the slot holding key k (home slot j), or None.
+            Items along a probe are ordered by distance, so the search stops
+            at the first item closer to its home than k would be.
+        """
+        table = self._table
+        d = 0
+        while True:
+            item = table[j]
+            if item is None or item._dist < d:
+                return None                         # k would have been placed here
+            if k == item._key:
+                return j
+            j = (j + 1) % len(table)
+            d += 1
+
+    def _remove(self, s):
+        """ Empty slot s, shifting the rest of its cluster back one place """
+        table = self._table
+        nxt = (s + 1) % len(table)
+        while table[nxt] is not None and table[nxt]._dist > 0:
+            table[nxt]._dist -= 1
+            table[s] = table[nxt]
+            s = nxt
+            nxt = (s + 1) % len(table)
+        table[s] = None                             # no tombstones needed
+
+    def _bucket_getitem(self, j, k):
+        s = self._find_slot(j, k)
+        if s is None:
+            raise KeyError('Key Error: ' + repr(k))
+        return self._table[s]._value
+
+    def _bucket_setitem(self, j, k, v):
+        table = self._table
+        d = 0
+        while True:
+            item = table[j]
+            if item is None:
+                table[j] = self._Slot(k, v, d)      # empty slot: insert here
+                self._n += 1
+                return
+            if k == item._key:
+                item._value = v                     # overwrite existing
+                return
+            if item._dist < d:                      # k is not in the table: take the
+                table[j] = self._Slot(k, v, d)      # slot from the richer item and
+                self._n += 1                        # carry it further along
+                carry = item
+                while True:
+                    j = (j + 1) % len(table)
+                    carry._dist += 1
+                    if table[j] is None:
+                        table[j] = carry
+                        return
+                    if table[j]._dist < carry._dist:
+                        table[j], carry = carry, table[j]
+            j = (j + 1) % len(table)
+            d += 1
+
+    def _bucket_delitem(self, j, k):
+        s = self._find_slot(j, k)
+        if s is None:
+            raise KeyError('Key Error: ' + repr(k))
+        self._remove(s)
+
+    def _bucket_drain(self, j):
+        """ Empty slot j and return the (key, value) pairs removed. Backward shifts
+            may move later items into j, so it is drained until truly empty. """
+        pairs = []
+        while self._table[j] is not None:
+            item = self._table[j]
+            pairs.append((item._key, item._value))
+            self._remove(j)
+        return pairs
+
+    def probe_stats(self):
+        """ Return (longest probe, mean probe, histogram) for the current table,
+            where histogram[d] counts items stored d slots past their home slot. """
+        histogram = []
+        for item in self._table:
+            if item is not None:
+                while len(histogram) <= item._dist:
+                    histogram.append(0)
+                histogram[item._dist] += 1
+        total = sum(d * c for d, c in enumerate(histogram))
+        mean = total / self._n if self._n else 0.0
+        return len(histogram) - 1, mean, histogram
+
+    def __iter__(self):
+        for item in self._table:
+            if item is not None:
+                yield item._key
+        if self._old is not None:                       # keys not migrated yet
+            for key in self._old:
+                yield key